@@ -102,6 +102,11 @@ df1.loc[1,'c']
 # %% [code]
 # Reading the dataset from a csv file using pandas.
 mtcars = pd.read_csv('../01_InFiles/mtcars.csv')
+# OR load the parsed df from the cache (the csv is re-parsed only when it changes)
+import sys
+sys.path.append('..')  # to import the shared helpers in dsutils
+from dsutils.cache import cached_load
+mtcars = cached_load('../01_InFiles/mtcars.csv')
 mtcars.head()
 mtcars.set_index('model', drop=True, inplace=True)
 # Type of
@@ -10,6 +10,9 @@
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
+import sys
+sys.path.append('..')  # to import the shared helpers in dsutils
+from dsutils.cache import cached_load
 sns.set(color_codes=True)  
 
 
@@ -18,6 +21,8 @@ sns.set(color_codes=True)
 # # Read data
 # %% [code]
 auto = pd.read_csv('../01_InFiles/Automobile.csv')
+# OR load the parsed df from the cache (the csv is re-parsed only when it changes)
+auto = cached_load('../01_InFiles/Automobile.csv')
 auto.head()
 
 
@@ -18,12 +18,28 @@
 # %% [code]
 import numpy as np
 import pandas as pd
-from pandas_profiling import ProfileReport
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import calendar
-start = pd.Timestamp.now()  
+import sys
+sys.path.append('..')  # to import the shared helpers in dsutils
+from dsutils.dates import add_datetime_columns, add_calendar_features
+from dsutils.trips import stream_aggregates, TripAggregateStore, read_clean_trips, aggregate_files
+from dsutils.locations import LocationDictionary
+from dsutils.odmatrix import ODMatrix
+from dsutils.graph import StationGraph
+from dsutils.instrument import StageTimer
+from dsutils.profiling import profile_frame
+from dsutils.cache import cached_load
+from dsutils.strings import read_csv_strings
+from dsutils.sketches import iqr_bounds
+from dsutils.index import TableIndex
+from dsutils.nulls import NullCensus
+from dsutils.groupagg import multi_aggregate
+from dsutils.topk import top_k_counts, top_k_rows, grouped_top_k
+start = pd.Timestamp.now()
+timer = StageTimer()  # per stage timings, see the end of the notebook
 
 
 
@@ -40,9 +56,37 @@ df
 # Load only selected columns
 df = pd.read_csv('../01_InFiles/Uber+Drives+2016.csv', usecols = ['START_DATE*', 'END_DATE*'])  
 df
+# Read in chunks (useful when the file doesn't fit in RAM)
+# Only the running groupby tables are kept in memory, not the rows
+agg = stream_aggregates('../01_InFiles/Uber+Drives+2016.csv', chunksize = 500)
+agg.n_rows
+agg.start_miles.sort_values(ascending = False).head(10)
+agg.cat_totals
+# OR keep the tables on disk and on every rerun only read the rows appended to the file since the last run
+store = TripAggregateStore('../02_OutFiles/trip_aggregates.pkl')
+store.ingest('../01_InFiles/Uber+Drives+2016.csv')  # no. of new trips
+store.save()
+store.aggregates.pair_counts.sort_values(ascending = False).head(10)
+# Read only the clean rows: all the filters used later in this notebook (MILES < 1000, 'Unknown Location',
+# zero duration and trips <= 5 mins) are applied chunk by chunk while reading
+df_clean, trip_filters = read_clean_trips('../01_InFiles/Uber+Drives+2016.csv', chunksize = 500)
+trip_filters.report()  # no. of rows rejected by each filter
+# With one file per driver, the files can be aggregated in parallel (one process per file)
+# and the partial tables merged into the same tables as above
+driver_files = ['../01_InFiles/Uber+Drives+2016.csv']
+fleet_agg, fleet_filters = aggregate_files(driver_files, clean = True)
+fleet_agg.extremes
 # Finally read data as required
-df = pd.read_csv('../01_InFiles/Uber+Drives+2016.csv')
+with timer.stage('read') as st:
+    df = pd.read_csv('../01_InFiles/Uber+Drives+2016.csv')
+    st['rows'] = len(df)
 df
+# OR load the parsed df from the cache (the csv is re-parsed only when it changes)
+df = cached_load('../01_InFiles/Uber+Drives+2016.csv')
+# OR keep the text columns (START, STOP, PURPOSE ...) as Arrow-backed strings: one contiguous buffer
+# per column instead of a Python object per value, and ==, isin, .str methods run without Python objects
+df = read_csv_strings('../01_InFiles/Uber+Drives+2016.csv')
+df.memory_usage(deep = True)
 
 
 
@@ -50,6 +94,7 @@ df
 # # Beautiful report from Pandas profiling [optional](optional)
 # %% [code]
 # # Regular report
+# from pandas_profiling import ProfileReport  # heavy import, so only done when needed
 # profile = ProfileReport(df, title="Pandas Profiling Report")
 # profile.to_widgets()  # style 1
 # profile.to_notebook_iframe()  # style 2
@@ -60,6 +105,12 @@ df
 # profile = ProfileReport(df, minimal=True)
 # # Save if req
 # profile.to_file("../02_OutFiles/pandasProfiling.html")
+# OR
+# A quick built-in profile (column stats, null map, histograms, correlations) in a compact html
+# Use `sample = n` to profile only n random rows of a big df
+profile = profile_frame(df, title = 'Uber trips profile')
+profile.stats
+profile.to_html('../02_OutFiles/quickProfile.html');
 
 
 
@@ -114,6 +165,13 @@ df.isnull().any().any()
 # Get the list of columns having any NaNs
 null_cols = df.columns[df.isnull().any()]
 list(null_cols)
+# OR
+# Take a null census once (one pass over the df) and read all the above from it
+census = NullCensus(df)
+census.null_counts  # NaNs per column
+census.any_null  # logical output per column
+census.has_nulls  # logical output for entire df
+list(census.null_columns)
 
 
 
@@ -139,6 +197,12 @@ df[df.MILES == 30]
 df[df.MILES != 30]
 # Same query in SQL format
 df.query('MILES > 30')
+# OR build a sorted index on the col once, then each query is a binary search instead of a full scan
+# (useful when firing many such queries on a big df)
+miles_index = TableIndex(df, ['MILES'])
+miles_index.query('MILES > 30')
+miles_index.where('MILES', '==', 30)
+miles_index.where('MILES', '!=', 30)
 
 
 
@@ -149,10 +213,21 @@ df.query('MILES > 30')
 # Top ten rows of max and min MILES
 df.sort_values(by = 'MILES' , ascending = False).head(10) 
 df.sort_values(by = 'MILES' , ascending = True).head(10) 
+# OR using partial selection instead of a full sort
+top_k_rows(df, 'MILES', k = 10)
+top_k_rows(df, 'MILES', k = 10, largest = False)
 # At this point - see Notes
 # Remove the row c/t anomalously high MILES value
 df[df.MILES ==df.MILES.max()]  
 df = df[df.MILES < 1000]  
+# OR derive the cutoff from the data instead of hard-coding 1000
+# `agg` (read in chunks above) keeps approximate quantile sketches of MILES, duration and speed, built in a single pass
+agg.sketches['MILES'].quantile([0.5, 0.99, 0.999])
+# the default sketch (k = 200) is only accurate to about 1% in rank; for a p99.9 fence ask for a bigger one
+tail_agg = stream_aggregates('../01_InFiles/Uber+Drives+2016.csv', chunksize = 500, sketch_k = 4000)
+tail_agg.sketches['MILES'].quantile([0.99, 0.999])
+iqr_bounds(agg.sketches['MILES'], factor = 3)  # (lower, upper) outlier fences
+iqr_bounds(agg.sketches['speed_mph'], factor = 3)
 
 
 
@@ -175,6 +250,9 @@ df.describe().T
 # # Drop rows with null values
 # %% [code]
 df_dropped = df.dropna()  
+# OR reuse the validity bitmasks of the census (`df` changed above, so take a new census)
+census = NullCensus(df)
+df_dropped = census.dropna(df)
 df_dropped.shape
 df.shape
 
@@ -233,6 +311,16 @@ print(len(stopSet))
 # Stations which appear in both start and stop locations 
 stopSet & startSet
 len(stopSet & startSet)
+# OR
+# Encode the station names as integer codes and do the set operations on bitsets
+locations = LocationDictionary()
+start_codes = locations.encode(df['START'])
+stop_codes = locations.encode(df['STOP'])
+startBits = locations.to_set(start_codes)
+stopBits = locations.to_set(stop_codes)
+len(stopBits & startBits)
+(stopBits - startBits).to_set()  # stations which are only stopping points
+locations.value_counts(start_codes).head(10)  # same as df['START'].value_counts()
 
 
 
@@ -243,6 +331,10 @@ len(stopSet & startSet)
 df['START'].value_counts().head(10)
 # Popular stopping stations - top 10
 df['STOP'].value_counts().head(10)
+# OR
+# Only the top 10 are selected and sorted, not every station
+top_k_counts(df['START'], 10)
+top_k_counts(df['STOP'], 10)
 # Rount trip stations
 df[df['START'] == df['STOP']]
 
@@ -252,10 +344,14 @@ df[df['START'] == df['STOP']]
 # # Destination - Favourite starting point w.r.t. miles covered
 # %% [code]
 k = df.groupby('START')['MILES'].sum().sort_values(ascending=False).head(10) 
+# OR without sorting all the groups
+with timer.stage('group', rows = len(df)):
+    k = grouped_top_k(df, 'START', 'MILES', k = 10, agg = 'sum')
 k = k.reset_index()  # series to df
 k.columns = ['START' ,'sum_of_miles']
-sns.barplot(data=k , x='START' , y='sum_of_miles');
-plt.xticks(rotation=70);
+with timer.stage('plot'):
+    sns.barplot(data=k , x='START' , y='sum_of_miles');
+    plt.xticks(rotation=70);
 
 
 
@@ -299,6 +395,20 @@ dfTest1
 dfTest1.groupby(['START','STOP'])['MILES'].size().sort_values(ascending=False)
 # Pefrom on real df
 df2.groupby(['START','STOP'])['MILES'].size().sort_values(ascending=False).head(10)
+# OR
+# Group once into a sparse START x STOP matrix and answer all the pair questions from it
+od = ODMatrix.from_trips(df, locations)
+od.top_pairs(10, measure = 'miles', exclude = ['Unknown Location'])  # farthest pairs
+od.top_pairs(10, measure = 'count', exclude = ['Unknown Location'])  # most popular pairs
+od.row('Cary').head(10)  # where do the trips from Cary go
+od.round_trips().head(10)  # trips with START == STOP
+# The same matrix seen as a graph of stations (edges weighted by trip count and miles)
+# Build it on df2 so that 'Unknown Location' doesn't connect unrelated stations
+stations = StationGraph.from_trips(df2)
+stations.degree('out').sort_values(ascending = False).head(10)  # no. of distinct destinations
+stations.connected_components().value_counts().head()  # sizes of the groups of connected stations
+stations.reachable('Cary')
+stations.shortest_path('Morrisville', 'Durham')  # (miles, route)
 
 
 
@@ -317,6 +427,12 @@ df.dtypes
 df['start_dt'] = df['START_DATE'].apply(lambda x : datetime.strptime(x, '%m/%d/%Y %H:%M'))
 df['end_dt'] = df['END_DATE'].apply(lambda x : datetime.strptime(x, '%m/%d/%Y %H:%M'))
 df.head()
+# OR
+# Parse both cols in one vectorized call per col (each unique string is parsed only once)
+# The returned df lists the rows that could not be parsed
+with timer.stage('parse dates', rows = len(df)):
+    failed_dates = add_datetime_columns(df, {'START_DATE': 'start_dt', 'END_DATE': 'end_dt'}, fmt='%m/%d/%Y %H:%M')
+failed_dates
 # See how the dtype is different now
 df.dtypes  
 
@@ -358,6 +474,11 @@ df.head()
 # Use the built in functions in datatime module
 df['cal_month1'] =  df['start_dt'].apply(lambda x : datetime.strftime(x,'%b'))
 df.head()
+# OR
+# Derive all the calendar cols above in one vectorized step
+# `day_of_week` and `cal_month` come out as categoricals, so groupbys on them are in calendar order
+add_calendar_features(df, 'start_dt')
+df.dtypes
 
 
 
@@ -531,7 +652,41 @@ df4.apply(lambda x: x/60)
 # Per purpose
 df5= df.groupby('PURPOSE').sum()['diff_mins'].sort_values(ascending = False)
 df5.apply(lambda x: x/60)
+# OR
+# Answer all the above questions from one spec: each key col is factorized only once
+# and all the sums/means on it are computed from the same group codes
+answers = multi_aggregate(df, [('CAT', 'MILES', 'sum'),
+                               ('PURPOSE', 'MILES', 'sum'),
+                               ('PURPOSE', 'MILES', 'mean'),
+                               ('CAT', 'diff_mins', 'sum'),
+                               ('PURPOSE', 'diff_mins', 'sum')])
+answers['CAT', 'MILES', 'sum'] / answers['CAT', 'MILES', 'sum'].sum() * 100  # % of miles
+answers['PURPOSE', 'diff_mins', 'sum'].sort_values(ascending = False) / 60
+
+
+
+# %% [markdown]
+# # Synthetic trip logs for scale testing [optional](optional)
+# The sample has only ~1150 trips. A generator that bootstraps trips from it (with jittered miles, durations
+# and start times) can write much bigger but statistically similar files to try the above code at scale.
+# %% [code]
+# from dsutils.synth import TripGenerator
+# generator = TripGenerator.from_csv('../01_InFiles/Uber+Drives+2016.csv', seed = 0)
+# generator.generate(5)
+# # 10M trips in the original csv layout, written 1M rows at a time
+# generator.write_csv('../02_OutFiles/synthetic_trips.csv', 10_000_000)
+# # OR as binary chunks which can be read back without parsing the dates
+# generator.write_chunks('../02_OutFiles/synthetic_trips', 10_000_000)
+
+
+
+# %% [markdown]
+# # Time taken
+# %% [code]
 print('Time elapased:', (pd.Timestamp.now()-start).total_seconds())
+# Where did the time go? (wall/cpu seconds, memory and rows per stage)
+timer.report()
+timer.to_json('../02_OutFiles/ms1_stage_timings.json')
 
 
 
@@ -39,6 +39,9 @@ import pandas as pd
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
+import sys
+sys.path.append('..')  # to import the shared helpers in dsutils
+from dsutils.cache import cached_load
 %matplotlib inline
 
 
@@ -47,6 +50,8 @@ import matplotlib.pyplot as plt
 # # Import the honeyproduction.csv file
 # %% [code]
 mydata = pd.read_csv("../01_InFiles/honeyproduction.csv")
+# OR load the parsed df from the cache (the csv is re-parsed only when it changes)
+mydata = cached_load("../01_InFiles/honeyproduction.csv")
 
 
 
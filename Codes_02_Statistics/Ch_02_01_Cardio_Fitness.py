@@ -24,6 +24,9 @@ import seaborn as sns
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+import sys
+sys.path.append('..')  # to import the shared helpers in dsutils
+from dsutils.cache import cached_load
 %matplotlib inline
 
 
@@ -32,6 +35,8 @@ import matplotlib.pyplot as plt
 # Load the Cardio Dataset 
 # %% [code]
 mydata = pd.read_csv('../01_InFiles/CardioGoodFitness.csv')
+# OR load the parsed df from the cache (the csv is re-parsed only when it changes)
+mydata = cached_load('../01_InFiles/CardioGoodFitness.csv')
 mydata.head()
 
 
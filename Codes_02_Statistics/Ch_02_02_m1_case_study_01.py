@@ -45,6 +45,9 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 import seaborn as sns
+import sys
+sys.path.append('..')  # to import the shared helpers in dsutils
+from dsutils.cache import cached_load
 
 
 
@@ -52,6 +55,8 @@ import seaborn as sns
 # # Import the data
 # %% [code]
 ch = pd.read_csv('../01_InFiles/Churn.csv')
+# OR load the parsed df from the cache (the csv is re-parsed only when it changes)
+ch = cached_load('../01_InFiles/Churn.csv')
 
 
 
@@ -30,6 +30,16 @@ import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
 import seaborn as sns
+import sys
+sys.path.append('..')  # to import the shared helpers in dsutils
+from dsutils.topk import top_k_counts
+from dsutils.nulls import NullCensus
+from dsutils.strings import read_csv_strings
+from dsutils.survey import read_survey
+from dsutils.multihot import MultiHot
+from dsutils.inverted import InvertedIndex
+from dsutils.units import SALARY_TO_MONTHLY
+from dsutils.numbers import parse_numbers
 
 
 # %% [markdown]
@@ -61,6 +71,11 @@ df.head()
 # # Correcting warning in reading dataset
 # %% 
 df = pd.read_csv('../01_InFiles/survey_results_public.csv', low_memory = False)  
+# OR store the text columns (Country, DevType, Currency ...) as Arrow-backed strings
+df = read_csv_strings('../01_InFiles/survey_results_public.csv', low_memory = False)
+# OR read it once with a dtype plan: the first run scans the file and saves the plan to 02_OutFiles,
+# later runs read categoricals, small ints, float32 and Arrow strings directly (no warning, far less memory)
+df = read_survey('../01_InFiles/survey_results_public.csv', schema_path = '../01_InFiles/survey_results_schema.csv')
 
 
 
@@ -134,6 +149,9 @@ df.info()
 df.isna()
 # %% 
 df.isna().apply(pd.value_counts)
+# %%
+# OR the same counts from a single pass null census (no full boolean df is kept)
+NullCensus(df).summary()
 
 
 
@@ -151,6 +169,8 @@ np.array(df.columns)
 # %% 
 # Get top 10 countries according to userbase
 df.Country.value_counts().head(10)
+# OR without sorting the counts of all countries
+top_k_counts(df.Country, 10)
 # %% 
 # Barplot of above stats for top 25 countries
 df.Country.value_counts().head(25).plot(kind = 'bar', edgecolor = 'black', color = 'lightblue', figsize = (15,5))
@@ -318,6 +338,11 @@ len(np.unique(title_list))
 # Get frequency of each job title
 series = pd.Series(title_list).value_counts()
 series
+# OR without any Python loop: a sparse respondents x job titles (multi-hot) matrix
+# (works for any ';' delimited col e.g. LanguageWorkedWith, PlatformWorkedWith)
+dev_types = MultiHot.from_column(df.DevType)
+series = dev_types.counts()
+dev_types.by(df.Country).loc[df.Country.value_counts().head(10).index]  # job titles in the top 10 countries
 # %% 
 # Modify the 'explode' parameter to highlight the job titles of data science people
 explode = np.zeros(len(series))
@@ -352,6 +377,15 @@ df.DevType.isin(['Data or business analyst', 'Data scientist or machine learning
 # Filter out the analysts from the main df
 analysts = df.loc[df.DevType.isin(['Data or business analyst', 'Data scientist or machine learning specialist']), :]
 analysts.head(10)
+# OR also count the respondents having one of these roles among others (e.g. 'Back-end developer;Data scientist ...'),
+# from an inverted index of the job titles (title -> rows) built once and reused for every query
+dev_type_index = InvertedIndex.from_column(df.DevType)
+country_index = InvertedIndex.from_column(df.Country, sep = None)
+rows = dev_type_index.any_of(['Data or business analyst', 'Data scientist or machine learning specialist'])
+df.iloc[rows.positions()].shape
+# OR analysts having both roles, and only the ones in India
+dev_type_index.all_of(['Data or business analyst', 'Data scientist or machine learning specialist'])
+df.iloc[(rows & country_index['India']).positions()].head()
 # %% 
 analysts.shape
 # %%
@@ -402,6 +436,8 @@ plt.show()
 salaries = analysts.loc[:,['Salary', 'SalaryType', 'Currency', 'ConvertedSalary']].dropna()
 # Remove the commas from the 'Salary' col
 salaries['Salary'] = salaries.Salary.apply(lambda x: x.replace(',', '')).apply(float)
+# OR parse the whole col at once (failed has the values which are not numbers, e.g. for a '1.234,5' style use locale = 'de')
+salaries['Salary'], failed = parse_numbers(salaries.Salary)
 salaries.head(10)
 # %% 
 # Frequency of different salary types 
@@ -416,6 +452,8 @@ for i in salaries.index:
         salaries.loc[i, 'monthly_salary'] = salaries.loc[i, 'ConvertedSalary']/12
     elif salaries.loc[i, 'SalaryType'] == 'Weekly':
         salaries.loc[i, 'monthly_salary'] = salaries.loc[i, 'ConvertedSalary']*4
+# OR in one vectorized step from the conversion table (Yearly: /12, Weekly: *4, Monthly: *1)
+salaries['monthly_salary'] = SALARY_TO_MONTHLY.apply(salaries, 'ConvertedSalary')
 # %% 
 salaries.head()
 # %% 
@@ -465,6 +503,8 @@ for i in Indian_salaries.index:
         Indian_salaries.loc[i, 'monthly_salary'] = Indian_salaries.loc[i, 'Salary']/12
     elif Indian_salaries.loc[i, 'SalaryType'] == 'Weekly':
         Indian_salaries.loc[i, 'monthly_salary'] = Indian_salaries.loc[i, 'Salary']*4
+# OR
+Indian_salaries['monthly_salary'] = SALARY_TO_MONTHLY.apply(Indian_salaries, 'Salary')
 # %% 
 # top 5 monthly Indian salaries
 pd.set_option('display.float_format', lambda x: '%.3f' % x)
@@ -0,0 +1,8 @@
+"""Shared helpers used by the case-study scripts in the Codes_* directories.
+
+The scripts run from inside their own chapter directory (they read data from
+``../01_InFiles``), so they make this package importable with::
+
+    import sys
+    sys.path.append('..')
+"""
@@ -0,0 +1,186 @@
+"""Benchmark of the Uber case-study stages at several data scales.
+
+Every stage of Ch_01_10_ms1 (read, date parse, derived features, groupbys,
+top-k, duration/speed math) is timed with `StageTimer` on synthetic trip logs
+of 1x, 100x and 10,000x the sample size. Throughput and memory are compared
+with a stored baseline, and a stage which got slower (or bigger) than the
+tolerance is reported as a regression.
+
+Run from the repo root::
+
+    python -m dsutils.bench --scales 1 100              # compare with the baseline
+    python -m dsutils.bench --scales 1 100 --update     # store a new baseline
+
+The exit status is 1 when a regression is found, or when a scale or stage
+has no baseline to compare with (store one with ``--update``).
+"""
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+from dsutils.dates import add_calendar_features, add_datetime_columns
+from dsutils.instrument import StageTimer
+from dsutils.synth import TripGenerator
+from dsutils.topk import grouped_top_k, top_k_counts
+from dsutils.trips import DATE_FORMAT, TRIP_COLUMNS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = os.path.join(ROOT, '01_InFiles', 'Uber+Drives+2016.csv')
+BENCH_DIR = os.path.join(ROOT, '02_OutFiles', 'bench')
+BASELINE = os.path.join(ROOT, '02_OutFiles', 'bench_baseline.json')
+SCALES = [1, 100, 10000]
+
+
+def _read(state, path):
+    state['df'] = pd.read_csv(path)
+
+
+def _parse_dates(state, path):
+    df = state['df']
+    df.columns = TRIP_COLUMNS
+    add_datetime_columns(df, {'START_DATE': 'start_dt', 'END_DATE': 'end_dt'}, fmt=DATE_FORMAT)
+
+
+def _features(state, path):
+    add_calendar_features(state['df'], 'start_dt')
+
+
+def _groupbys(state, path):
+    df = state['df']
+    df.groupby('START')['MILES'].sum()
+    df.groupby(['START', 'STOP']).size()
+    df.groupby('start_month').size()
+    df.groupby('day_of_week', observed=True).size()
+    df.groupby('CAT')['MILES'].sum()
+    df.groupby('PURPOSE')['MILES'].agg(['sum', 'mean'])
+
+
+def _top_k(state, path):
+    df = state['df']
+    top_k_counts(df['START'], 10)
+    top_k_counts(df['STOP'], 10)
+    grouped_top_k(df, 'START', 'MILES', k=10)
+    grouped_top_k(df, ['START', 'STOP'], 'MILES', k=10)
+
+
+def _duration_speed(state, path):
+    df = state['df']
+    df['diff_mins'] = (df['end_dt'] - df['start_dt']).dt.total_seconds() // 60
+    df = df[df['diff_mins'] > 5]
+    speed = df['MILES'] / (df['diff_mins'] / 60)
+    speed.describe()
+
+
+# In the order they run; each stage works on the frame left by the previous one
+STAGES = [('read', _read), ('parse_dates', _parse_dates), ('features', _features),
+          ('groupbys', _groupbys), ('top_k', _top_k), ('duration_speed', _duration_speed)]
+
+
+def bench_file(scale, bench_dir=BENCH_DIR, seed=0):
+    """Synthetic csv of `scale` times the sample size (generated once)."""
+    os.makedirs(bench_dir, exist_ok=True)
+    path = os.path.join(bench_dir, 'trips_x%d_seed%d.csv' % (scale, seed))
+    if not os.path.exists(path):
+        generator = TripGenerator.from_csv(SAMPLE, seed=seed)
+        generator.write_csv(path, scale * len(generator.miles))
+    return path
+
+
+def _run_stages(path, trace_memory=False):
+    timer = StageTimer(trace_memory=trace_memory)
+    state = {}
+    for name, stage in STAGES:
+        with timer.stage(name) as st:
+            stage(state, path)
+            st['rows'] = len(state['df'])
+    return timer.report()
+
+
+def run_benchmark(scales=SCALES, bench_dir=BENCH_DIR, seed=0, repeat=3):
+    """Time every stage at every scale; one row per (scale, stage).
+
+    Timings are the best of `repeat` runs. Memory (`peak_alloc_mb`) comes
+    from one extra run with tracemalloc on, so tracing doesn't skew timings.
+    """
+    reports = []
+    for scale in scales:
+        path = bench_file(scale, bench_dir, seed)
+        runs = pd.concat([_run_stages(path) for _ in range(repeat)])
+        best = runs.groupby('stage', sort=False).agg(
+            rows=('rows', 'first'), wall_s=('wall_s', 'min'), cpu_s=('cpu_s', 'min'),
+            peak_rss_mb=('peak_rss_mb', 'max'))
+        best['rows_per_s'] = best['rows'] / best['wall_s']
+        memory = _run_stages(path, trace_memory=True).set_index('stage')
+        best['peak_alloc_mb'] = memory['peak_alloc_mb']
+        best = best.reset_index()
+        best.insert(0, 'scale', scale)
+        reports.append(best)
+    return pd.concat(reports, ignore_index=True)
+
+
+def compare(results, baseline, tolerance=0.2, min_wall_s=0.05):
+    """Join `results` with `baseline` and flag the regressions.
+
+    A stage regresses when its throughput dropped, or its peak allocation
+    rose, by more than `tolerance` (a fraction) compared with the baseline.
+    Stages faster than `min_wall_s` are too noisy to judge their speed.
+    Rows with no baseline to compare with are flagged in `missing`.
+    """
+    keys = ['scale', 'stage']
+    merged = results.merge(baseline[keys + ['rows_per_s', 'wall_s', 'peak_alloc_mb']], on=keys,
+                           how='left', suffixes=('', '_baseline'), indicator=True)
+    merged['missing'] = merged.pop('_merge') == 'left_only'
+    merged['speed_ratio'] = merged['rows_per_s'] / merged['rows_per_s_baseline']
+    timed = merged[['wall_s', 'wall_s_baseline']].max(axis=1) >= min_wall_s
+    slower = timed & (merged['speed_ratio'] < 1 - tolerance)
+    # Ignore a growth of less than 1 MB, mostly interpreter noise
+    bigger = merged['peak_alloc_mb'] > merged['peak_alloc_mb_baseline'] * (1 + tolerance) + 1
+    merged['regression'] = slower | bigger
+    return merged
+
+
+def load_baseline(path=BASELINE):
+    with open(path) as f:
+        return pd.DataFrame(json.load(f))
+
+
+def save_baseline(results, path=BASELINE):
+    with open(path, 'w') as f:
+        f.write(results.to_json(orient='records', indent=2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--bench-dir', default=BENCH_DIR)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--update', action='store_true', help='store the results as the new baseline')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.scales, args.bench_dir, repeat=args.repeat)
+    columns = ['scale', 'stage', 'rows', 'wall_s', 'rows_per_s', 'peak_alloc_mb', 'peak_rss_mb']
+    if args.update or not os.path.exists(args.baseline):
+        save_baseline(results, args.baseline)
+        print(results[columns].to_string(index=False))
+        print('Baseline written to', args.baseline)
+        return 0
+    compared = compare(results, load_baseline(args.baseline), args.tolerance)
+    print(compared[columns + ['speed_ratio', 'regression']].to_string(index=False))
+    if compared['missing'].any():
+        for scale, stages in compared[compared['missing']].groupby('scale')['stage']:
+            print('No baseline for scale %d (stages: %s)' % (scale, ', '.join(stages)))
+        print('Run with --update to store a baseline for them')
+        return 1
+    if compared['regression'].any():
+        print('Regressions found')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
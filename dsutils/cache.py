@@ -0,0 +1,135 @@
+"""Content-addressed cache of parsed input datasets.
+
+``cached_load('../01_InFiles/Churn.csv')`` parses the csv once and stores the
+resulting DataFrame in ``02_OutFiles/cache``. The cache key is the sha256 of the
+source file's content plus the loader, the cleaning function (its name, code
+and closure values) and the parsing options, so a rerun loads the stored frame
+directly and any change to the file, the cleaning code or the options makes a
+new entry. Globals a cleaning function reads are not part of the key; bump
+`version` when those change.
+
+Frames are stored as parquet when pyarrow is installed (columnar, keeps the
+dtypes), otherwise (or if parquet can't hold a column) as pickle.
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 '02_OutFiles', 'cache')
+
+
+def file_digest(path, block_size=2**20):
+    """sha256 hex digest of the content of `path`."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class DatasetCache:
+    """Cache directory of parsed DataFrames keyed by source content and options.
+
+    Hashing a big file on every run is itself slow, so digests are memoised
+    per (path, size, mtime) in ``digests.json``; a file is only re-hashed when
+    its size or modification time changes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._digests_path = os.path.join(cache_dir, 'digests.json')
+        if os.path.exists(self._digests_path):
+            with open(self._digests_path) as f:
+                self._digests = json.load(f)
+        else:
+            self._digests = {}
+
+    def digest(self, path):
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        key = os.path.abspath(path)
+        entry = self._digests.get(key)
+        if entry is None or entry[0] != stamp:
+            entry = [stamp, file_digest(path)]
+            self._digests[key] = entry
+            with open(self._digests_path, 'w') as f:
+                json.dump(self._digests, f)
+        return entry[1]
+
+    def key(self, path, loader, clean, options, version):
+        parts = {
+            'source': self.digest(path),
+            'loader': _qualname(loader),
+            'clean': _qualname(clean),
+            'options': repr(sorted(options.items())),
+            'version': version,
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:32]
+
+    def load(self, path, loader=pd.read_csv, clean=None, version=0, **options):
+        """Return ``clean(loader(path, **options))``, from the cache when possible.
+
+        Bump `version` to invalidate entries when `clean` changes.
+        """
+        entry = os.path.join(self.cache_dir, self.key(path, loader, clean, options, version))
+        if os.path.exists(entry + '.parquet'):
+            return pd.read_parquet(entry + '.parquet')
+        if os.path.exists(entry + '.pkl'):
+            return pd.read_pickle(entry + '.pkl')
+        df = loader(path, **options)
+        if clean is not None:
+            df = clean(df)
+        if HAS_PYARROW:
+            try:
+                df.to_parquet(entry + '.parquet')
+                return df
+            except (ValueError, TypeError, pyarrow.ArrowException):
+                # e.g. object columns mixing str and float; pickle handles those
+                if os.path.exists(entry + '.parquet'):
+                    os.remove(entry + '.parquet')
+        df.to_pickle(entry + '.pkl')
+        return df
+
+
+def _qualname(func):
+    """Name of `func` plus a digest of its code, so that two lambdas, or a
+    function edited since the entry was made, get different keys."""
+    if func is None:
+        return None
+    name = '%s.%s' % (getattr(func, '__module__', ''), getattr(func, '__qualname__', repr(func)))
+    code = getattr(func, '__code__', None)
+    if code is None:  # builtins, partials ...
+        return name
+    closure = [_value_key(cell.cell_contents) for cell in func.__closure__ or ()]
+    defaults = [_value_key(value) for value in func.__defaults__ or ()]
+    parts = [_code_key(code), repr(closure), repr(defaults)]
+    return '%s:%s' % (name, hashlib.sha256('|'.join(parts).encode()).hexdigest()[:16])
+
+
+def _code_key(code):
+    consts = [_code_key(c) if hasattr(c, 'co_code') else repr(c) for c in code.co_consts]
+    return '%s|%r|%r' % (code.co_code.hex(), consts, code.co_names)
+
+
+def _value_key(value):
+    # Functions repr with their address, which changes from run to run
+    if callable(value) and hasattr(value, '__code__'):
+        return _qualname(value)
+    return repr(value)
+
+
+def cached_load(path, loader=pd.read_csv, clean=None, version=0,
+                cache_dir=DEFAULT_CACHE_DIR, **options):
+    """Shortcut for ``DatasetCache(cache_dir).load(path, ...)``."""
+    return DatasetCache(cache_dir).load(path, loader=loader, clean=clean,
+                                        version=version, **options)
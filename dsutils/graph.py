@@ -0,0 +1,86 @@
+"""Station graph of START -> STOP trips as a CSR adjacency matrix.
+
+Nodes are the stations of a `LocationDictionary`, and there is an edge a -> b
+when at least one trip went from a to b, weighted by the trip count and the
+miles driven. Degree, reachability, connected components and shortest paths
+are computed with `scipy.sparse.csgraph` on the CSR matrices, without any
+pandas groupby.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from dsutils.odmatrix import ODMatrix
+
+
+class StationGraph:
+    """Directed, weighted station graph built from an `ODMatrix`."""
+
+    def __init__(self, od):
+        self.od = od
+        self.dictionary = od.dictionary
+        self.counts = od.matrices['count']
+        self.miles = od.matrices['miles']
+        # Length of an edge = average miles of a trip along it. A tiny
+        # positive value keeps 0-mile edges from disappearing.
+        edges = self.counts.tocoo()
+        miles = np.asarray(self.miles[edges.row, edges.col]).ravel()
+        self.length = sparse.csr_matrix(
+            (np.maximum(miles / edges.data, 1e-9), (edges.row, edges.col)),
+            shape=self.counts.shape)
+
+    @classmethod
+    def from_trips(cls, df, dictionary=None):
+        return cls(ODMatrix.from_trips(df, dictionary))
+
+    def _code(self, name):
+        return self.od._code(name)
+
+    def _names(self, codes):
+        return list(self.dictionary.names[codes])
+
+    def degree(self, kind='out', weighted=False):
+        """Number of distinct neighbours (or trips if `weighted`) per station.
+
+        `kind` is 'out' (destinations), 'in' (origins) or 'total'.
+        """
+        m = self.counts if weighted else (self.counts > 0).astype(np.int64)
+        out = np.asarray(m.sum(axis=1)).ravel()
+        into = np.asarray(m.sum(axis=0)).ravel()
+        values = {'out': out, 'in': into, 'total': out + into}[kind]
+        return pd.Series(values, index=self.dictionary.names[:len(values)], name='degree')
+
+    def reachable(self, start):
+        """Stations reachable from `start` following trip directions."""
+        order = csgraph.breadth_first_order(self.counts, self._code(start),
+                                            directed=True, return_predecessors=False)
+        return self._names(order)
+
+    def connected_components(self, connection='weak'):
+        """Component label of every station ('weak' or 'strong')."""
+        _, labels = csgraph.connected_components(self.counts, directed=True,
+                                                 connection=connection)
+        return pd.Series(labels, index=self.dictionary.names[:len(labels)],
+                         name='component')
+
+    def shortest_path(self, start, stop):
+        """Route from `start` to `stop` minimising the average trip miles.
+
+        Returns ``(miles, [stations])``, or ``(inf, [])`` if there is no route.
+        """
+        source, target = self._code(start), self._code(stop)
+        dist, pred = csgraph.dijkstra(self.length, directed=True, indices=source,
+                                      return_predecessors=True)
+        if np.isinf(dist[target]):
+            return np.inf, []
+        path = [target]
+        while path[-1] != source:
+            path.append(pred[path[-1]])
+        return float(dist[target]), self._names(path[::-1])
+
+    def distances_from(self, start):
+        """Shortest route miles from `start` to every reachable station."""
+        dist = csgraph.dijkstra(self.length, directed=True, indices=self._code(start))
+        s = pd.Series(dist, index=self.dictionary.names[:len(dist)], name='miles')
+        return s[np.isfinite(s)].sort_values()
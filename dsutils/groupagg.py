@@ -0,0 +1,181 @@
+"""Many grouped aggregations computed together from shared group codes.
+
+The closing questions of Ch_01_10_ms1 run ``groupby('CAT').sum()``,
+``groupby('PURPOSE').mean()``, ``agg({'MILES': 'sum'})`` ... one after the
+other, and each of them hashes the key column again. Here every key is
+factorized once, and all the reducers asked for on it are `np.bincount`
+passes over the same integer codes; a mean reuses the sum and count already
+computed for the same column.
+
+    results = multi_aggregate(df, [('CAT', 'MILES', 'sum'),
+                                   ('PURPOSE', 'MILES', 'mean'),
+                                   ('PURPOSE', 'diff_mins', 'sum')])
+    results['CAT', 'MILES', 'sum']     # == df.groupby('CAT')['MILES'].sum()
+"""
+import numpy as np
+import pandas as pd
+
+REDUCERS = ['sum', 'count', 'size', 'mean', 'min', 'max', 'var', 'std']
+
+
+class GroupAggregator:
+    """Grouped reducers over a DataFrame with cached factorizations.
+
+    Keys are a column name or a tuple of column names. Like
+    ``df.groupby(key)``, groups are sorted and rows with a null key dropped.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._groups = {}
+        self._stats = {}
+
+    def groups(self, key):
+        """``(codes, index)`` of `key`, factorized once per key."""
+        if key not in self._groups:
+            columns = list(key) if isinstance(key, tuple) else [key]
+            codes = np.zeros(len(self.df), dtype=np.int64)
+            levels = []
+            for column in columns:
+                c, uniques = pd.factorize(self.df[column], sort=True)
+                # Combine into one code per distinct key tuple (-1 = null key)
+                codes = np.where((codes < 0) | (c < 0), -1, codes * len(uniques) + c)
+                levels.append(uniques)
+            valid = codes >= 0
+            used, codes[valid] = np.unique(codes[valid], return_inverse=True)
+            if len(columns) == 1:
+                index = pd.Index(levels[0][used], name=key)
+            else:
+                # Split the combined codes back into one code per level
+                level_codes = []
+                for uniques in reversed(levels):
+                    level_codes.append(used % len(uniques))
+                    used = used // len(uniques)
+                index = pd.MultiIndex(levels=levels, codes=level_codes[::-1], names=columns)
+            self._groups[key] = (codes, index)
+        return self._groups[key]
+
+    def _stat(self, key, column, name):
+        """Cached sum / count / squared deviations of `column` per group."""
+        cache_key = (key, column, name)
+        if cache_key not in self._stats:
+            codes, index = self.groups(key)
+            if name == 'count':
+                # Any dtype can be counted, like groupby().count()
+                valid = (codes >= 0) & self.df[column].notna().to_numpy()
+                self._stats[cache_key] = np.bincount(codes[valid], minlength=len(index))
+                return self._stats[cache_key]
+            values = self._numbers(column)
+            valid = (codes >= 0) & ~np.isnan(values)
+            codes, values = codes[valid], values[valid]
+            if name == 'sum':
+                weights = values
+            else:
+                # Deviations from the group means in a second pass, not
+                # sum(x^2) - sum(x)^2 / n which cancels badly when the values are
+                # large next to their spread. Values are first shifted by the
+                # first value of their group so the means are exact too.
+                shift = np.zeros(len(index))
+                shift[codes[::-1]] = values[::-1]
+                values = values - shift[codes]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    means = (np.bincount(codes, weights=values, minlength=len(index))
+                             / self._stat(key, column, 'count'))
+                weights = (values - means[codes]) ** 2
+            self._stats[cache_key] = np.bincount(codes, weights=weights, minlength=len(index))
+        return self._stats[cache_key]
+
+    def _numbers(self, column):
+        values = self.df[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            raise TypeError('column %r (%s) is not numeric' % (column, values.dtype))
+        return values.to_numpy(dtype=float, na_value=np.nan)
+
+    def _extreme(self, key, column, how):
+        """Per-group min/max; datetime and timedelta columns keep their dtype."""
+        codes, index = self.groups(key)
+        series = self.df[column]
+        tz = getattr(series.dtype, 'tz', None)
+        if tz is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        if series.dtype.kind in 'mM':
+            # Reduce the int64 nanoseconds (NaT excluded) and cast back
+            dtype = series.dtype
+            valid = (codes >= 0) & series.notna().to_numpy()
+            values = series.to_numpy().view(np.int64)
+        else:
+            dtype = None
+            values = self._numbers(column)
+            valid = (codes >= 0) & ~np.isnan(values)
+        codes, values = codes[valid], values[valid]
+        order = np.argsort(codes, kind='stable')
+        codes, values = codes[order], values[order]
+        result = np.zeros(len(index), dtype=values.dtype)
+        found = np.zeros(len(index), dtype=bool)
+        if len(codes):
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            ufunc = np.minimum if how == 'min' else np.maximum
+            result[codes[starts]] = ufunc.reduceat(values, starts)
+            found[codes[starts]] = True
+        if dtype is None:
+            return np.where(found, result, np.nan)
+        result = pd.Series(result.view(dtype)).where(found).array
+        if tz is not None:
+            result = pd.Series(result).dt.tz_localize('UTC').dt.tz_convert(tz).array
+        return result
+
+    def aggregate(self, key, column, reducer):
+        """Same as ``df.groupby(key)[column].agg(reducer)``.
+
+        `count` and `size` work on any column and `min`/`max` also on datetime
+        and timedelta ones; other reducers need a numeric column (TypeError
+        otherwise).
+        """
+        codes, index = self.groups(key)
+        if reducer == 'size':
+            values = np.bincount(codes[codes >= 0], minlength=len(index))
+        elif reducer in ('sum', 'count'):
+            values = self._stat(key, column, reducer)
+        elif reducer == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = self._stat(key, column, 'sum') / self._stat(key, column, 'count')
+        elif reducer in ('var', 'std'):
+            n = self._stat(key, column, 'count')
+            squares = self._stat(key, column, 'squares')
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = np.where(n > 1, squares / (n - 1), np.nan)
+            if reducer == 'std':
+                values = np.sqrt(values)
+        elif reducer in ('min', 'max'):
+            values = self._extreme(key, column, reducer)
+        else:
+            raise ValueError('reducer must be one of %s' % REDUCERS)
+        if reducer in ('count', 'size'):
+            values = values.astype(np.int64)
+        return pd.Series(values, index=index, name=column)
+
+    def run(self, spec):
+        """Compute every ``(key, column, reducer)`` of `spec`; returns a dict."""
+        return {(key, column, reducer): self.aggregate(key, column, reducer)
+                for key, column, reducer in spec}
+
+    def table(self, key, aggs):
+        """One DataFrame per key, like ``df.groupby(key).agg(aggs)``.
+
+        `aggs` maps a column to a reducer or a list of reducers; output
+        columns are named ``column`` for a single reducer, else
+        ``column_reducer``.
+        """
+        out = {}
+        for column, reducers in aggs.items():
+            if isinstance(reducers, str):
+                out[column] = self.aggregate(key, column, reducers)
+            else:
+                for reducer in reducers:
+                    out['%s_%s' % (column, reducer)] = self.aggregate(key, column, reducer)
+        return pd.DataFrame(out)
+
+
+def multi_aggregate(df, spec):
+    """Compute a list of ``(key, column, reducer)`` aggregations in one go."""
+    return GroupAggregator(df).run(spec)
@@ -0,0 +1,137 @@
+"""Sorted secondary indexes for fast range/equality filters on numeric columns.
+
+Building a `SortedIndex` costs one argsort; afterwards every ``==``, ``<``,
+``between`` ... predicate is two binary searches and returns the matching row
+positions without scanning the column. `TableIndex` wraps a few of them and
+understands simple ``df.query`` style strings like ``'MILES > 30'``.
+"""
+import ast
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class SortedIndex:
+    """Row positions of a column sorted by value (nulls kept aside)."""
+
+    def __init__(self, values):
+        values = pd.Series(values)
+        if pd.api.types.is_datetime64_any_dtype(values):
+            self._convert = pd.Timestamp
+            keys = values.to_numpy()
+        else:
+            self._convert = None
+            keys = values.to_numpy(dtype=float)
+        null = pd.isna(values).to_numpy()
+        self.null_positions = np.flatnonzero(null)
+        valid = np.flatnonzero(~null)
+        order = np.argsort(keys[valid], kind='stable')
+        self.positions = valid[order]
+        self.keys = keys[valid][order]
+        self.n = len(values)
+
+    def _key(self, value):
+        if self._convert is not None:
+            return np.datetime64(self._convert(value)).astype(self.keys.dtype)
+        return value
+
+    def _slice(self, lo, hi, sort):
+        result = self.positions[lo:hi]
+        return np.sort(result) if sort else result
+
+    def eq(self, value, sort=True):
+        key = self._key(value)
+        lo = np.searchsorted(self.keys, key, side='left')
+        hi = np.searchsorted(self.keys, key, side='right')
+        return self._slice(lo, hi, sort)
+
+    def ne(self, value, sort=True):
+        """Rows != value; like pandas, null rows are included."""
+        key = self._key(value)
+        lo = np.searchsorted(self.keys, key, side='left')
+        hi = np.searchsorted(self.keys, key, side='right')
+        result = np.concatenate([self.positions[:lo], self.positions[hi:], self.null_positions])
+        return np.sort(result) if sort else result
+
+    def lt(self, value, sort=True):
+        return self._slice(0, np.searchsorted(self.keys, self._key(value), side='left'), sort)
+
+    def le(self, value, sort=True):
+        return self._slice(0, np.searchsorted(self.keys, self._key(value), side='right'), sort)
+
+    def gt(self, value, sort=True):
+        return self._slice(np.searchsorted(self.keys, self._key(value), side='right'), None, sort)
+
+    def ge(self, value, sort=True):
+        return self._slice(np.searchsorted(self.keys, self._key(value), side='left'), None, sort)
+
+    def between(self, low, high, inclusive='both', sort=True):
+        """Rows with low <= value <= high (see `Series.between` for `inclusive`)."""
+        left = 'left' if inclusive in ('both', 'left') else 'right'
+        right = 'right' if inclusive in ('both', 'right') else 'left'
+        lo = np.searchsorted(self.keys, self._key(low), side=left)
+        hi = np.searchsorted(self.keys, self._key(high), side=right)
+        return self._slice(lo, max(lo, hi), sort)
+
+
+_OPS = {'==': 'eq', '!=': 'ne', '<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge'}
+_FLIPPED = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '==', '!=': '!='}
+_TERM = re.compile(r'^\s*(\S+?)\s*(==|!=|<=|>=|<|>)\s*(.+?)\s*$')
+
+
+class TableIndex:
+    """Sorted indexes on some columns of a DataFrame.
+
+    ``TableIndex(df, ['MILES', 'start_dt']).query('MILES > 30')`` returns the
+    same rows as ``df.query('MILES > 30')``. Supported queries are
+    comparisons of an indexed column with a literal, joined with ``and``/``&``.
+    The index reflects `df` at build time; rebuild it after modifying `df`.
+    """
+
+    def __init__(self, df, columns):
+        self.df = df
+        self.indexes = {c: SortedIndex(df[c]) for c in columns}
+
+    def positions(self, column, op, value):
+        return getattr(self.indexes[column], _OPS[op])(value)
+
+    def query_positions(self, expr):
+        result = None
+        unsupported = re.search(r'\s(or|not)\s|^\s*not\s|[|~]', expr)
+        if unsupported:
+            raise ValueError('unsupported operator %r in query %r; only comparisons '
+                             'joined with and/& are supported' % (unsupported.group().strip(), expr))
+        for term in re.split(r'\s+and\s+|\s*&\s*', expr.strip()):
+            match = _TERM.match(term.strip('() '))
+            if match is None:
+                raise ValueError('unsupported query term: %r' % term)
+            column, op, literal = match.groups()
+            if column not in self.indexes:
+                if literal not in self.indexes:
+                    name = literal if _is_literal(column) else column
+                    raise KeyError('column %r is not indexed (indexed: %s)'
+                                   % (name, ', '.join(self.indexes)))
+                # Written the other way round, e.g. '30 < MILES'
+                column, literal, op = literal, column, _FLIPPED[op]
+            if not _is_literal(literal):
+                raise ValueError('%r in query term %r is not a literal' % (literal, term))
+            value = ast.literal_eval(literal)
+            pos = self.positions(column, op, value)
+            result = pos if result is None else np.intersect1d(result, pos, assume_unique=True)
+        return result
+
+    def query(self, expr):
+        return self.df.iloc[self.query_positions(expr)]
+
+    def where(self, column, op, value):
+        """Rows where ``df[column] <op> value``, e.g. ``where('MILES', '==', 30)``."""
+        return self.df.iloc[self.positions(column, op, value)]
+
+
+def _is_literal(text):
+    try:
+        ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return False
+    return True
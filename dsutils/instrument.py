@@ -0,0 +1,142 @@
+"""Lightweight per-stage timing and memory instrumentation for the scripts.
+
+Usage::
+
+    timer = StageTimer()
+    with timer.stage('read') as st:
+        df = pd.read_csv(...)
+        st['rows'] = len(df)
+    timer.report()              # one row per stage
+    timer.to_json('../02_OutFiles/timings.json')
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss_mb():
+    """Resident memory of this process in MB (None if unknown)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """High-water mark of resident memory of this process in MB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+class _RssSampler(threading.Thread):
+    """Polls the resident memory every `interval` seconds and keeps the maximum."""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            rss = current_rss_mb()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        rss = current_rss_mb()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+        return self.peak
+
+
+class StageTimer:
+    """Records wall time, CPU time, memory and row counts of named stages.
+
+    `peak_rss_mb` is the highest resident memory seen during the stage, from
+    a thread sampling it every `rss_interval` seconds (so a spike shorter
+    than that can be missed). `process_peak_rss_mb` is the high-water mark
+    of the whole process so far, as reported by the OS.
+
+    With ``trace_memory=True`` the peak of Python/numpy allocations during
+    each stage is also recorded (`peak_alloc_mb`, via tracemalloc). It is
+    exact per stage, unlike RSS, but slows the stages down.
+    """
+
+    def __init__(self, trace_memory=False, rss_interval=0.01):
+        self.records = []
+        self.trace_memory = trace_memory
+        self.rss_interval = rss_interval
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time the body of a ``with`` block as stage `name`.
+
+        The yielded dict is the stage's record; set ``st['rows']`` inside the
+        block if the row count is only known there.
+        """
+        record = {'stage': name, 'rows': rows}
+        rss_before = current_rss_mb()
+        if self.trace_memory:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            alloc_before = tracemalloc.get_traced_memory()[0]
+        sampler = None
+        if rss_before is not None:
+            sampler = _RssSampler(self.rss_interval)
+            sampler.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - wall
+            record['cpu_s'] = time.process_time() - cpu
+            record['peak_rss_mb'] = None if sampler is None else sampler.stop()
+            rss_after = current_rss_mb()
+            record['rss_mb'] = rss_after
+            record['rss_delta_mb'] = (None if rss_before is None
+                                      else rss_after - rss_before)
+            record['process_peak_rss_mb'] = peak_rss_mb()
+            if self.trace_memory:
+                record['peak_alloc_mb'] = (tracemalloc.get_traced_memory()[1] - alloc_before) / 2**20
+                if started_tracing:
+                    tracemalloc.stop()
+            if record['rows'] and record['wall_s'] > 0:
+                record['rows_per_s'] = record['rows'] / record['wall_s']
+            self.records.append(record)
+
+    def report(self):
+        """One row per stage, in the order the stages finished."""
+        columns = ['stage', 'rows', 'wall_s', 'cpu_s', 'rows_per_s', 'rss_mb',
+                   'rss_delta_mb', 'peak_rss_mb', 'process_peak_rss_mb']
+        if self.trace_memory:
+            columns.append('peak_alloc_mb')
+        return pd.DataFrame(self.records, columns=columns)
+
+    def to_json(self, path=None):
+        """The records as JSON; written to `path` if given."""
+        text = json.dumps(self.records, indent=2, default=str)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
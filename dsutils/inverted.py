@@ -0,0 +1,225 @@
+"""Token -> rows inverted index over survey columns, with compressed row bitmaps.
+
+``df.DevType.isin(['Data or business analyst', ...])`` only matches the
+respondents whose whole answer is one of those roles, and scans every string
+to do it. An `InvertedIndex` splits a ';'-delimited column once and keeps, for
+every token, the set of rows having it as a `RowBitmap`. A query is then a
+few set operations on the posting lists, and it can be combined with the
+index of a single-choice column (Country, Age ...) the same way:
+
+    roles = InvertedIndex.from_column(df.DevType)
+    country = InvertedIndex.from_column(df.Country, sep=None)
+    rows = roles.any_of(['Data or business analyst', 'Data scientist or machine learning specialist'])
+    rows &= country['India']
+    df.iloc[rows.positions()]
+
+`RowBitmap` is laid out like a roaring bitmap: rows are split in chunks of
+65,536, and a chunk holding few rows keeps them as a sorted uint16 array
+while a dense chunk keeps a packed bitset (8 KB).
+"""
+import numpy as np
+import pandas as pd
+
+from dsutils.multihot import MultiHot
+
+CHUNK_BITS = 16
+CHUNK = 1 << CHUNK_BITS
+ARRAY_MAX = 4096  # above this many rows a chunk is smaller as a bitset
+
+
+def _container(low):
+    """Smallest container for the sorted, distinct uint16 offsets `low`."""
+    if len(low) <= ARRAY_MAX:
+        return low.astype(np.uint16)
+    present = np.zeros(CHUNK, dtype=bool)
+    present[low] = True
+    return np.packbits(present)
+
+
+def _shrink(bits):
+    """A bitset container, as an array when that is smaller."""
+    present = np.unpackbits(bits)
+    if present.sum() > ARRAY_MAX:
+        return bits
+    return np.flatnonzero(present).astype(np.uint16)
+
+
+def _offsets(container):
+    if container.dtype == np.uint16:
+        return container
+    return np.flatnonzero(np.unpackbits(container)).astype(np.uint16)
+
+
+def _bits(container):
+    if container.dtype == np.uint8:
+        return container
+    present = np.zeros(CHUNK, dtype=bool)
+    present[container] = True
+    return np.packbits(present)
+
+
+def _and(a, b):
+    if a.dtype == np.uint16 and b.dtype == np.uint16:
+        return np.intersect1d(a, b, assume_unique=True)
+    if a.dtype == np.uint16 or b.dtype == np.uint16:
+        low, bits = (a, b) if a.dtype == np.uint16 else (b, a)
+        # Look the offsets up in the bitset (packbits is big-endian)
+        return low[(bits[low >> 3] >> (7 - (low & 7))) & 1 == 1]
+    return _shrink(a & b)
+
+
+def _or(a, b):
+    if a.dtype == np.uint16 and b.dtype == np.uint16:
+        return _container(np.union1d(a, b))
+    return _bits(a) | _bits(b)
+
+
+def _sub(a, b):
+    if a.dtype == np.uint16:
+        return a[~np.isin(a, _offsets(b), assume_unique=True)]
+    return _shrink(a & ~_bits(b))
+
+
+class RowBitmap:
+    """Set of row positions in roaring-style compressed chunks.
+
+    Supports ``&``, ``|``, ``-``, ``len()`` and ``in`` like a Python set.
+    """
+
+    def __init__(self, containers=None):
+        # chunk number -> container, never empty
+        self.containers = containers or {}
+
+    @classmethod
+    def from_positions(cls, positions):
+        """Bitmap of the sorted, distinct row `positions`."""
+        positions = np.asarray(positions, dtype=np.int64)
+        high = positions >> CHUNK_BITS
+        starts = np.flatnonzero(np.r_[True, high[1:] != high[:-1]]) if len(positions) else []
+        bounds = np.r_[starts, len(positions)]
+        return cls({int(high[lo]): _container(positions[lo:hi] & (CHUNK - 1))
+                    for lo, hi in zip(bounds[:-1], bounds[1:])})
+
+    def _combine(self, other, op, keys):
+        containers = {}
+        for key in keys:
+            if key not in other.containers:
+                containers[key] = self.containers[key]
+            elif key not in self.containers:
+                containers[key] = other.containers[key]
+            else:
+                container = op(self.containers[key], other.containers[key])
+                if len(container):
+                    containers[key] = container
+        return RowBitmap(containers)
+
+    def __and__(self, other):
+        keys = self.containers.keys() & other.containers.keys()
+        return self._combine(other, _and, sorted(keys))
+
+    def __or__(self, other):
+        keys = self.containers.keys() | other.containers.keys()
+        return self._combine(other, _or, sorted(keys))
+
+    def __sub__(self, other):
+        result = {}
+        for key, container in self.containers.items():
+            if key in other.containers:
+                container = _sub(container, other.containers[key])
+            if len(container):
+                result[key] = container
+        return RowBitmap(result)
+
+    def __len__(self):
+        return sum(len(c) if c.dtype == np.uint16 else int(np.unpackbits(c).sum())
+                   for c in self.containers.values())
+
+    def __contains__(self, position):
+        container = self.containers.get(position >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = position & (CHUNK - 1)
+        if container.dtype == np.uint16:
+            i = np.searchsorted(container, low)
+            return bool(i < len(container) and container[i] == low)
+        return bool((container[low >> 3] >> (7 - (low & 7))) & 1)
+
+    def positions(self):
+        """Sorted row positions, e.g. for ``df.iloc[...]``."""
+        parts = [(key << CHUNK_BITS) + _offsets(self.containers[key]).astype(np.int64)
+                 for key in sorted(self.containers)]
+        return np.concatenate(parts) if parts else np.array([], dtype=np.int64)
+
+    def mask(self, n):
+        """Boolean array of length `n`, True on the rows of the bitmap."""
+        mask = np.zeros(n, dtype=bool)
+        mask[self.positions()] = True
+        return mask
+
+    def nbytes(self):
+        return sum(c.nbytes for c in self.containers.values())
+
+    def __repr__(self):
+        return 'RowBitmap(%d rows)' % len(self)
+
+
+class InvertedIndex:
+    """Posting list (`RowBitmap`) of the rows having each token of a column.
+
+    Rows are positions (0 .. n-1), as used by ``df.iloc``.
+    """
+
+    def __init__(self, postings, n_rows):
+        self.postings = postings
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_column(cls, values, sep=';'):
+        """Index a `sep`-delimited column; ``sep=None`` indexes whole values."""
+        values = pd.Series(values)
+        if sep is None:
+            codes, vocabulary = pd.factorize(values)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(vocabulary) + 1))
+            rows = order
+        else:
+            # The columns of the multi-hot matrix are the posting lists
+            hot = MultiHot.from_column(values, sep=sep)
+            matrix = hot.matrix.tocsc()
+            matrix.sort_indices()
+            vocabulary, rows, bounds = hot.vocabulary, matrix.indices, matrix.indptr
+        postings = {token: RowBitmap.from_positions(rows[bounds[code]:bounds[code + 1]])
+                    for code, token in enumerate(vocabulary)}
+        return cls(postings, len(values))
+
+    def __getitem__(self, token):
+        return self.postings[token]
+
+    def tokens(self):
+        return list(self.postings)
+
+    def counts(self):
+        """Number of rows with each token, largest first."""
+        return pd.Series({token: len(rows) for token, rows in self.postings.items()},
+                         dtype=np.int64).sort_values(ascending=False)
+
+    def any_of(self, tokens):
+        """Rows having at least one of `tokens`."""
+        result = RowBitmap()
+        for token in tokens:
+            result = result | self.postings.get(token, RowBitmap())
+        return result
+
+    def all_of(self, tokens):
+        """Rows having every one of `tokens`."""
+        # Intersect the shortest posting lists first
+        postings = sorted((self.postings.get(token, RowBitmap()) for token in tokens), key=len)
+        if not postings:
+            return self.everything()
+        result = postings[0]
+        for rows in postings[1:]:
+            result = result & rows
+        return result
+
+    def everything(self):
+        return RowBitmap.from_positions(np.arange(self.n_rows))
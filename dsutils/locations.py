@@ -0,0 +1,131 @@
+"""Integer codes for START/STOP location names and set operations on them.
+
+A `LocationDictionary` interns every location name it sees into a compact
+integer code. The same dictionary can be reused (and saved) across files, so a
+given station always gets the same code. Sets of stations are then held as
+bitsets (`LocationSet`) and counts are `np.bincount` over the codes.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class LocationDictionary:
+    """Append-only mapping of location name <-> integer code."""
+
+    def __init__(self, names=()):
+        self._index = pd.Index(pd.unique(pd.Series(list(names), dtype=object)))
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def names(self):
+        return self._index
+
+    def encode(self, values):
+        """Return int32 codes for `values`, adding unseen names.
+
+        Nulls are encoded as -1.
+        """
+        values = pd.Series(values, dtype=object)
+        codes = self._index.get_indexer(values)
+        missing = (codes == -1) & values.notna().values
+        if missing.any():
+            new = pd.unique(values[missing])
+            self._index = self._index.append(pd.Index(new))
+            codes[missing] = self._index.get_indexer(values[missing])
+        return codes.astype(np.int32)
+
+    def decode(self, codes):
+        """Return the names for `codes` (NaN for -1)."""
+        codes = np.asarray(codes)
+        names = np.append(self._index.values, np.nan)
+        return names[np.where(codes < 0, len(self._index), codes)]
+
+    def counts(self, codes):
+        """Number of occurrences of every code, indexed by code."""
+        codes = np.asarray(codes)
+        return np.bincount(codes[codes >= 0], minlength=len(self))
+
+    def value_counts(self, codes):
+        """Same as `Series.value_counts()` on the decoded names."""
+        counts = pd.Series(self.counts(codes), index=self._index)
+        return counts[counts > 0].sort_values(ascending=False)
+
+    def to_set(self, codes):
+        """`LocationSet` of the distinct codes present in `codes`."""
+        return LocationSet.from_codes(codes, self)
+
+    def save(self, path):
+        pd.Series(self._index, name='name').to_csv(path, index=False)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        return cls(pd.read_csv(path, keep_default_na=False)['name'])
+
+
+class LocationSet:
+    """Set of locations held as a packed bitset over dictionary codes.
+
+    Supports ``&``, ``|``, ``-``, ``^``, ``len()`` and ``in`` like a
+    Python set. Operands may have been built when the dictionary was smaller;
+    they are padded to the longer bitset.
+    """
+
+    def __init__(self, bits, dictionary):
+        self.bits = bits
+        self.dictionary = dictionary
+
+    @classmethod
+    def from_codes(cls, codes, dictionary):
+        codes = np.asarray(codes)
+        present = np.zeros(len(dictionary), dtype=bool)
+        present[codes[codes >= 0]] = True
+        return cls(np.packbits(present), dictionary)
+
+    def _aligned(self, other):
+        n = max(len(self.bits), len(other.bits))
+        a = np.zeros(n, dtype=np.uint8)
+        b = np.zeros(n, dtype=np.uint8)
+        a[:len(self.bits)] = self.bits
+        b[:len(other.bits)] = other.bits
+        return a, b
+
+    def __and__(self, other):
+        a, b = self._aligned(other)
+        return LocationSet(a & b, self.dictionary)
+
+    def __or__(self, other):
+        a, b = self._aligned(other)
+        return LocationSet(a | b, self.dictionary)
+
+    def __sub__(self, other):
+        a, b = self._aligned(other)
+        return LocationSet(a & ~b, self.dictionary)
+
+    def __xor__(self, other):
+        a, b = self._aligned(other)
+        return LocationSet(a ^ b, self.dictionary)
+
+    def __len__(self):
+        return int(np.unpackbits(self.bits).sum())
+
+    def __contains__(self, name):
+        code = self.dictionary.names.get_indexer([name])[0]
+        if code < 0 or code // 8 >= len(self.bits):
+            return False
+        return bool(np.unpackbits(self.bits)[code])
+
+    def codes(self):
+        return np.flatnonzero(np.unpackbits(self.bits))
+
+    def to_set(self):
+        """Plain Python set of location names."""
+        return set(self.dictionary.decode(self.codes()))
+
+    def __repr__(self):
+        return 'LocationSet(%d locations)' % len(self)
@@ -0,0 +1,108 @@
+"""Sparse multi-hot encoding of ';'-delimited multi-select answers.
+
+Survey columns such as DevType, LanguageWorkedWith or PlatformWorkedWith hold
+all the answers of a respondent joined by ';'. `MultiHot` turns such a column
+into a respondents x tokens CSR matrix of 0/1. Only the distinct answer
+strings are split (a few thousand, however many rows), and rows pick their
+row of that small matrix, so no Python loop runs over the respondents. Role
+counts, per-country breakdowns and filters are then sparse matrix products.
+
+    roles = MultiHot.from_column(df.DevType)
+    roles.counts()                      # respondents per role
+    roles.by(df.Country)                # country x role counts
+    df[roles.has_any(['Data or business analyst'])]
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class MultiHot:
+    """Rows x tokens 0/1 CSR matrix with the token vocabulary and row index."""
+
+    def __init__(self, matrix, vocabulary, index):
+        self.matrix = matrix
+        self.vocabulary = vocabulary
+        self.index = index
+
+    @classmethod
+    def from_column(cls, values, sep=';', vocabulary=None):
+        """Encode a Series of `sep`-joined answers; missing values are empty rows.
+
+        Pass the `vocabulary` of another `MultiHot` to share token codes
+        (e.g. LanguageWorkedWith and LanguageDesireNextYear); tokens it lacks
+        are appended.
+        """
+        values = pd.Series(values)
+        codes, uniques = pd.factorize(values)
+        tokens = pd.Series(uniques, dtype=object).str.split(sep).explode().str.strip()
+        tokens = tokens[tokens.notna() & (tokens != '')]
+        vocabulary = pd.Index([] if vocabulary is None else vocabulary, dtype=object)
+        new = pd.Index(pd.unique(tokens.to_numpy(dtype=object))).difference(vocabulary, sort=False)
+        vocabulary = vocabulary.append(new)
+        # One row per distinct answer string, then one per respondent
+        per_unique = sparse.csr_matrix(
+            (np.ones(len(tokens), dtype=np.int8),
+             (tokens.index.to_numpy(), vocabulary.get_indexer(tokens))),
+            shape=(len(uniques), len(vocabulary)))
+        per_unique.sum_duplicates()
+        per_unique.data[:] = 1  # a token repeated within one answer counts once
+        # Missing answers (code -1) point at an extra empty row
+        per_unique = sparse.vstack([per_unique, sparse.csr_matrix((1, len(vocabulary)), dtype=np.int8)],
+                                   format='csr')
+        return cls(per_unique[codes], vocabulary, values.index)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def _columns(self, tokens):
+        if isinstance(tokens, str):
+            tokens = [tokens]
+        columns = self.vocabulary.get_indexer(tokens)
+        if (columns < 0).any():
+            raise KeyError([t for t, c in zip(tokens, columns) if c < 0])
+        return columns
+
+    def counts(self):
+        """Number of rows with each token, largest first."""
+        totals = np.asarray(self.matrix.sum(axis=0, dtype=np.int64)).ravel()
+        return pd.Series(totals, index=self.vocabulary).sort_values(ascending=False)
+
+    def n_tokens(self):
+        """Number of tokens of each row."""
+        return pd.Series(np.diff(self.matrix.indptr), index=self.index)
+
+    def by(self, groups):
+        """groups x tokens counts, e.g. ``roles.by(df.Country)``.
+
+        Rows with a missing group are left out, like in a groupby.
+        """
+        codes, uniques = pd.factorize(pd.Series(groups), sort=True)
+        keep = np.flatnonzero(codes >= 0)
+        indicator = sparse.csr_matrix((np.ones(len(keep), dtype=np.int64), (codes[keep], keep)),
+                                      shape=(len(uniques), len(self)))
+        table = (indicator @ self.matrix).toarray()
+        return pd.DataFrame(table, index=pd.Index(uniques, name=getattr(groups, 'name', None)),
+                            columns=self.vocabulary)
+
+    def has_any(self, tokens):
+        """Boolean mask of the rows with at least one of `tokens`."""
+        hits = self.matrix[:, self._columns(tokens)].getnnz(axis=1)
+        return pd.Series(hits > 0, index=self.index)
+
+    def has_all(self, tokens):
+        """Boolean mask of the rows with every one of `tokens`."""
+        # A token listed twice is still one column to have
+        columns = np.unique(self._columns(tokens))
+        hits = self.matrix[:, columns].getnnz(axis=1)
+        return pd.Series(hits == len(columns), index=self.index)
+
+    def cooccurrence(self):
+        """tokens x tokens counts of rows having both tokens (diagonal = counts)."""
+        m = self.matrix.astype(np.int64)
+        return pd.DataFrame((m.T @ m).toarray(), index=self.vocabulary, columns=self.vocabulary)
+
+    def to_frame(self):
+        """The matrix as a sparse 0/1 DataFrame (one column per token)."""
+        return pd.DataFrame.sparse.from_spmatrix(self.matrix, index=self.index,
+                                                 columns=self.vocabulary)
@@ -0,0 +1,79 @@
+"""Single-pass null census of a DataFrame with packed validity bitmasks.
+
+``NullCensus(df)`` looks at every column once and keeps, per column, a packed
+bitmask of the non-null rows (1 bit per row). All the usual questions are then
+answered from the census instead of building a new boolean frame each time:
+
+    census.null_counts      # df.isnull().sum()
+    census.any_null         # df.isnull().any()
+    census.null_columns     # df.columns[df.isnull().any()]
+    census.row_completeness # share of non-null cells per row
+    census.dropna(df)       # df.dropna(), reusing the bitmasks
+"""
+import numpy as np
+import pandas as pd
+
+
+class NullCensus:
+    """Null counts, null columns and validity bitmasks of a DataFrame."""
+
+    def __init__(self, df):
+        self.columns = df.columns
+        self.index = df.index
+        self.n_rows = len(df)
+        self.masks = {}
+        counts = []
+        complete = np.zeros(self.n_rows, dtype=np.int32)
+        for column in df.columns:
+            valid = df[column].notna().to_numpy()
+            complete += valid
+            counts.append(self.n_rows - int(valid.sum()))
+            self.masks[column] = np.packbits(valid)
+        self.null_counts = pd.Series(counts, index=df.columns, dtype=np.int64)
+        self._complete = complete
+
+    @property
+    def any_null(self):
+        return self.null_counts > 0
+
+    @property
+    def has_nulls(self):
+        """Same as ``df.isnull().any().any()``."""
+        return bool(self.any_null.any())
+
+    @property
+    def null_columns(self):
+        return self.columns[self.any_null.to_numpy()]
+
+    @property
+    def row_completeness(self):
+        """Fraction of non-null cells of every row."""
+        return pd.Series(self._complete / max(len(self.columns), 1), index=self.index)
+
+    def summary(self):
+        """Per-column nulls / non-nulls, like ``df.isna().apply(pd.value_counts)``."""
+        return pd.DataFrame({'nulls': self.null_counts,
+                             'non_nulls': self.n_rows - self.null_counts,
+                             '% null': self.null_counts / max(self.n_rows, 1) * 100})
+
+    def valid(self, columns=None, how='all'):
+        """Boolean mask of the rows valid in all (or any) of `columns`."""
+        columns = self.columns if columns is None else columns
+        packed = [self.masks[c] for c in columns]
+        if not packed:
+            return np.ones(self.n_rows, dtype=bool)
+        combine = np.bitwise_and if how == 'all' else np.bitwise_or
+        bits = combine.reduce(packed)
+        return np.unpackbits(bits, count=self.n_rows).astype(bool)
+
+    def dropna(self, df, subset=None, how='any'):
+        """Same as ``df.dropna(subset=subset, how=how)`` for the censused `df`.
+
+        With ``how='any'`` rows need every column valid; with ``how='all'``
+        one valid column is enough.
+        """
+        if len(df) != self.n_rows:
+            raise ValueError('df has %d rows, the census was taken on %d'
+                             % (len(df), self.n_rows))
+        keep = self.valid(subset, how='all' if how == 'any' else 'any')
+        return df[keep]
@@ -0,0 +1,109 @@
+"""Sparse origin-destination (START x STOP) matrix of trips."""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from dsutils.locations import LocationDictionary
+from dsutils.topk import top_positions
+
+
+class ODMatrix:
+    """Trip counts, miles and duration (mins) per START -> STOP pair.
+
+    Each measure is a square CSR matrix indexed by the codes of a
+    `LocationDictionary`, so the raw frame is grouped once and every later
+    question (a station's destinations, the top pairs, round trips ...) is
+    answered from the matrices.
+    """
+
+    def __init__(self, matrices, dictionary):
+        self.matrices = matrices
+        self.dictionary = dictionary
+
+    @classmethod
+    def from_trips(cls, df, dictionary=None):
+        """Build the matrix from a trip frame with START, STOP and MILES.
+
+        Duration is taken from `start_dt`/`end_dt` when present.
+        """
+        if dictionary is None:
+            dictionary = LocationDictionary()
+        i = dictionary.encode(df['START'])
+        j = dictionary.encode(df['STOP'])
+        keep = (i >= 0) & (j >= 0)
+        i, j = i[keep], j[keep]
+        data = {
+            'count': np.ones(len(i), dtype=np.int64),
+            'miles': df['MILES'].to_numpy(dtype=float)[keep],
+        }
+        if 'start_dt' in df and 'end_dt' in df:
+            duration = (df['end_dt'] - df['start_dt']).dt.total_seconds() / 60
+            data['duration'] = duration.to_numpy()[keep]
+        n = len(dictionary)
+        matrices = {}
+        for name, values in data.items():
+            values = np.nan_to_num(values)
+            # Duplicate (i, j) entries are summed when converting to CSR
+            matrices[name] = sparse.coo_matrix((values, (i, j)), shape=(n, n)).tocsr()
+        return cls(matrices, dictionary)
+
+    def _matrix(self, measure):
+        if measure not in self.matrices:
+            raise KeyError('measure must be one of %s' % list(self.matrices))
+        return self.matrices[measure]
+
+    def _code(self, name):
+        code = self.dictionary.names.get_indexer([name])[0]
+        if code < 0 or code >= self._matrix('count').shape[0]:
+            raise KeyError(name)
+        return code
+
+    def _series(self, codes, values, name):
+        s = pd.Series(values, index=self.dictionary.names[codes], name=name)
+        return s.sort_values(ascending=False)
+
+    def row(self, start, measure='count'):
+        """Destinations of `start` with their `measure`, largest first."""
+        r = self._matrix(measure).getrow(self._code(start))
+        return self._series(r.indices, r.data, measure)
+
+    def column(self, stop, measure='count'):
+        """Origins of trips ending at `stop`, largest first."""
+        c = self._matrix(measure).getcol(self._code(stop)).tocoo()
+        return self._series(c.row, c.data, measure)
+
+    def totals(self, axis, measure='count'):
+        """`measure` summed per START (axis=0) or per STOP (axis=1)."""
+        m = self._matrix(measure)
+        values = np.asarray(m.sum(axis=1 - axis)).ravel()
+        codes = np.flatnonzero(values)
+        return self._series(codes, values[codes], measure)
+
+    def top_pairs(self, k=10, measure='count', exclude=()):
+        """The `k` START/STOP pairs with the largest `measure`.
+
+        Same result as ``df.groupby(['START','STOP'])[...].sort_values().head(k)``
+        but uses a partial selection over the non-zero pairs only. Pairs
+        touching any station in `exclude` are skipped.
+        """
+        coo = self._matrix(measure).tocoo()
+        keep = coo.data != 0
+        if len(exclude):
+            dropped = self.dictionary.names.get_indexer(list(exclude))
+            dropped = dropped[dropped >= 0]
+            keep &= ~np.isin(coo.row, dropped) & ~np.isin(coo.col, dropped)
+        rows, cols, data = coo.row[keep], coo.col[keep], coo.data[keep]
+        best = top_positions(data, k)
+        index = pd.MultiIndex.from_arrays(
+            [self.dictionary.names[rows[best]], self.dictionary.names[cols[best]]],
+            names=['START', 'STOP'])
+        return pd.Series(data[best], index=index, name=measure)
+
+    def round_trips(self, measure='count'):
+        """`measure` of the trips with START == STOP, per station."""
+        diag = self._matrix(measure).diagonal()
+        codes = np.flatnonzero(diag)
+        return self._series(codes, diag[codes], measure)
+
+    def pair(self, start, stop, measure='count'):
+        return self._matrix(measure)[self._code(start), self._code(stop)]
@@ -0,0 +1,116 @@
+"""A small, fast dataset profiler (a light replacement for pandas_profiling).
+
+``profile_frame(df)`` computes per-column stats, a null map, histograms and the
+correlation matrix of the numeric columns. Columns are profiled in a thread
+pool, and with ``sample=n`` only n random rows are looked at, which keeps the
+report to a few seconds on tens of millions of rows.
+"""
+import html
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+def _column_profile(s, bins):
+    """Stats and histogram of one column."""
+    stats = {
+        'dtype': str(s.dtype),
+        'count': int(s.count()),
+        'nulls': int(s.isna().sum()),
+        'unique': int(s.nunique()),
+    }
+    hist = None
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        values = s.dropna().to_numpy(dtype=float)
+        if len(values):
+            stats.update(mean=values.mean(), std=values.std(ddof=1) if len(values) > 1 else 0.0,
+                         min=values.min(), max=values.max())
+            for q, v in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                stats['%d%%' % (q * 100)] = v
+            hist = np.histogram(values, bins=bins)
+    elif pd.api.types.is_datetime64_any_dtype(s):
+        stats.update(min=s.min(), max=s.max())
+    else:
+        top = s.value_counts().head(5)
+        stats['top'] = ', '.join('%s (%d)' % (k, v) for k, v in top.items())
+    return stats, hist
+
+
+class Profile:
+    """Result of `profile_frame`."""
+
+    def __init__(self, stats, histograms, nulls, correlations, n_rows, n_profiled, title):
+        self.stats = stats
+        self.histograms = histograms
+        self.nulls = nulls
+        self.correlations = correlations
+        self.n_rows = n_rows
+        self.n_profiled = n_profiled
+        self.title = title
+
+    def to_html(self, path=None):
+        """Render the profile as a compact, self-contained HTML page."""
+        parts = ['<html><head><meta charset="utf-8"><title>%s</title>' % html.escape(self.title),
+                 '<style>body{font-family:sans-serif;font-size:13px}'
+                 'table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:2px 6px}'
+                 '.bar{fill:steelblue}</style></head><body>',
+                 '<h1>%s</h1>' % html.escape(self.title)]
+        mode = 'exact' if self.n_profiled == self.n_rows else 'sampled'
+        parts.append('<p>%d rows, %d columns, %s profile on %d rows</p>'
+                     % (self.n_rows, len(self.stats), mode, self.n_profiled))
+        parts.append('<h2>Columns</h2>' + self.stats.to_html(float_format='{:.4g}'.format, na_rep=''))
+        parts.append('<h2>Null map</h2><p>% of nulls per block of rows</p>' + _null_map(self.nulls))
+        parts.append('<h2>Histograms</h2>')
+        for name, (counts, edges) in self.histograms.items():
+            parts.append('<h3>%s</h3>%s<br>%.4g &ndash; %.4g'
+                         % (html.escape(str(name)), _svg_bars(counts), edges[0], edges[-1]))
+        if not self.correlations.empty:
+            parts.append('<h2>Correlations</h2>' + self.correlations.to_html(float_format='{:.2f}'.format))
+        parts.append('</body></html>')
+        text = '\n'.join(parts)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+
+def _null_map(nulls):
+    header = ''.join('<th>%s</th>' % html.escape(str(c)) for c in nulls.columns)
+    rows = []
+    for block, values in nulls.iterrows():
+        cells = ''.join('<td style="background:rgba(200,0,0,%.2f)" title="%.1f%%"></td>'
+                        % (v / 100, v) for v in values)
+        rows.append('<tr><th>%s</th>%s</tr>' % (block, cells))
+    return '<table><tr><th></th>%s</tr>%s</table>' % (header, ''.join(rows))
+
+
+def _svg_bars(counts, width=300, height=60):
+    top = max(counts.max(), 1)
+    w = width / len(counts)
+    bars = ''.join('<rect class="bar" x="%.1f" y="%.1f" width="%.1f" height="%.1f"/>'
+                   % (i * w, height - c / top * height, w - 1, c / top * height)
+                   for i, c in enumerate(counts))
+    return '<svg width="%d" height="%d">%s</svg>' % (width, height, bars)
+
+
+def profile_frame(df, sample=None, bins=20, workers=None, title='Profile report',
+                  random_state=0):
+    """Profile `df`; with ``sample=n`` only n random rows are profiled."""
+    n_rows = len(df)
+    if sample is not None and sample < n_rows:
+        # Keep the file order so that the null map blocks stay meaningful
+        df = df.sample(sample, random_state=random_state).sort_index()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda c: _column_profile(df[c], bins), df.columns))
+    stats = pd.DataFrame([r[0] for r in results], index=df.columns)
+    stats['% null'] = stats['nulls'] / max(len(df), 1) * 100
+    histograms = {c: r[1] for c, r in zip(df.columns, results) if r[1] is not None}
+    # Null map: % of nulls per column in each of (at most) 50 row blocks
+    blocks = np.arange(len(df)) * min(50, max(len(df), 1)) // max(len(df), 1)
+    nulls = df.isna().groupby(blocks).mean().mul(100)
+    numeric = df.select_dtypes('number')
+    correlations = numeric.corr() if numeric.shape[1] > 1 else pd.DataFrame()
+    return Profile(stats, histograms, nulls, correlations, n_rows, len(df), title)
@@ -0,0 +1,115 @@
+"""Mergeable approximate quantile sketch (KLL style) for single-pass statistics.
+
+A `QuantileSketch` keeps a few hundred values no matter how many it has seen,
+answers quantile / rank queries with a rank error of about 1-2% (k=200), and
+two sketches built on different chunks or files can be merged. This makes
+data-derived outlier thresholds possible on inputs that never fit in memory.
+"""
+import numpy as np
+
+
+class QuantileSketch:
+    """KLL quantile sketch over float values.
+
+    Values are kept in levels of compactors: an item at level h stands for
+    2**h input values. When a level grows beyond its capacity it is sorted and
+    every other item (random offset) is promoted to the next level.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h):
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # An odd item out stays at this level
+                keep = level[:1] if len(level) % 2 else level[:0]
+                pairs = level[len(keep):]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                # Capacities depend on the number of levels, so start over
+                h = 0
+            else:
+                h += 1
+
+    def update(self, values):
+        """Add an array (or Series) of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h)
+                                  for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Approximate q-quantile(s); `q` may be a scalar or a list."""
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        values, cum = self._weighted()
+        ranks = np.asarray(q, dtype=float) * cum[-1]
+        pos = np.minimum(np.searchsorted(cum, ranks, side='left'), len(values) - 1)
+        result = values[pos]
+        # The exact extremes are known, use them for q = 0 and q = 1
+        result = np.where(np.asarray(q) <= 0, self.min, result)
+        result = np.where(np.asarray(q) >= 1, self.max, result)
+        return result if np.ndim(q) else float(result)
+
+    def rank(self, x):
+        """Approximate fraction of the values <= x."""
+        if self.n == 0:
+            return np.nan
+        values, cum = self._weighted()
+        i = np.searchsorted(values, x, side='right')
+        return cum[i - 1] / cum[-1] if i else 0.0
+
+    def __len__(self):
+        return self.n
+
+    def size(self):
+        """Number of values actually stored."""
+        return sum(len(level) for level in self.levels)
+
+
+def iqr_bounds(sketch, factor=1.5):
+    """Tukey fences ``(Q1 - factor*IQR, Q3 + factor*IQR)`` from a sketch."""
+    q1, q3 = sketch.quantile([0.25, 0.75])
+    iqr = q3 - q1
+    return q1 - factor * iqr, q3 + factor * iqr
@@ -0,0 +1,80 @@
+"""Arrow-backed storage for text columns.
+
+An object column keeps one Python str per value (50+ bytes each, plus the
+pointer) and every hash or comparison goes through those objects. An
+Arrow-backed string column keeps all the values in one contiguous buffer plus
+an offsets array, and ``==``, ``isin``, ``factorize``, ``.str.contains`` or
+``.str.split`` run as Arrow compute kernels on that buffer.
+
+    trips = read_csv_strings('../01_InFiles/Uber+Drives+2016.csv')
+    trips = cached_load(path, loader=read_csv_strings, string_columns=['START*', 'STOP*'])
+
+Missing values stay NaN (not pd.NA) where pandas allows it, so masks such as
+``df.START != 'Unknown Location'`` give the same rows as with object columns.
+Without pyarrow the columns are left as they are.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def _string_dtype():
+    # The NaN flavour was renamed across pandas versions; fall back to pd.NA
+    for make in (lambda: pd.StringDtype('pyarrow', na_value=np.nan),
+                 lambda: pd.StringDtype('pyarrow_numpy'),
+                 lambda: pd.StringDtype('pyarrow')):
+        try:
+            return make()
+        except (TypeError, ValueError, ImportError):
+            continue
+    return object
+
+
+STRING_DTYPE = _string_dtype() if HAS_PYARROW else object
+
+
+def text_columns(df):
+    """Columns of `df` holding only strings (and missing values).
+
+    Object columns mixing strings with numbers are left out, converting them
+    would turn the numbers into text.
+    """
+    columns = []
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.StringDtype):
+            columns.append(column)
+        elif dtype == object and pd.api.types.infer_dtype(df[column], skipna=True) == 'string':
+            columns.append(column)
+    return columns
+
+
+def to_arrow_strings(df, columns=None):
+    """`df` with `columns` (default: all text columns) as Arrow-backed strings.
+
+    Returns `df` unchanged when pyarrow is not installed.
+    """
+    if STRING_DTYPE is object:
+        return df
+    if columns is None:
+        columns = text_columns(df)
+    return df.astype({column: STRING_DTYPE for column in columns})
+
+
+def read_csv_strings(path, string_columns=None, **kwargs):
+    """`pd.read_csv` with the text columns stored as Arrow-backed strings.
+
+    Listed `string_columns` are parsed straight into Arrow strings; without
+    them every text column is converted after reading. Other keyword
+    arguments are passed on to `pd.read_csv`.
+    """
+    if string_columns is not None and STRING_DTYPE is not object:
+        dtype = dict(kwargs.pop('dtype', None) or {})
+        dtype.update({column: STRING_DTYPE for column in string_columns})
+        return pd.read_csv(path, dtype=dtype, **kwargs)
+    return to_arrow_strings(pd.read_csv(path, **kwargs))
@@ -0,0 +1,166 @@
+"""Typed loading of the Stack Overflow survey (survey_results_public.csv).
+
+Read without dtypes the survey hits the mixed-dtype warning, and re-read with
+``low_memory=False`` every column lands as int64, float64 or object. Here the
+file is scanned once to make a dtype plan, which is saved next to the outputs
+and used for every later read of the same file (a changed file is re-planned):
+
+- integer columns without gaps get the smallest int type holding their range
+- float columns (and integer ones with gaps) become float32 when that loses
+  nothing
+- single-choice text columns become categoricals
+- multi-select columns (the schema says "select all that apply", or values
+  are ';'-joined) and other high-cardinality text become Arrow-backed strings
+
+    survey = read_survey('../01_InFiles/survey_results_public.csv')
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from dsutils.cache import DatasetCache, file_digest
+from dsutils.strings import STRING_DTYPE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA = os.path.join(ROOT, '01_InFiles', 'survey_results_schema.csv')
+DEFAULT_PLAN = os.path.join(ROOT, '02_OutFiles', 'survey_dtype_plan.json')
+
+INT_TYPES = ['int8', 'int16', 'int32', 'int64']
+
+
+def schema_multi_select(schema_path=SCHEMA):
+    """Columns whose question text says 'select all that apply'."""
+    schema = pd.read_csv(schema_path)
+    multi = schema['QuestionText'].str.contains('all that apply', case=False, na=False)
+    return schema.loc[multi, 'Column'].tolist()
+
+
+class _ColumnScan:
+    """What one scan over the file learns about a column."""
+
+    def __init__(self, max_categories):
+        self.max_categories = max_categories
+        self.n_valid = 0
+        self.has_nulls = False
+        self.numeric = True
+        self.integer = True
+        self.float32_exact = True
+        self.low = np.inf
+        self.high = -np.inf
+        self.uniques = set()
+        self.delimited = False
+
+    def update(self, values):
+        valid = values.dropna()
+        self.has_nulls |= len(valid) < len(values)
+        self.n_valid += len(valid)
+        if self.numeric:
+            numbers = pd.to_numeric(valid, errors='coerce')
+            if numbers.isna().any():
+                self.numeric = False
+            elif len(numbers):
+                # Integer text only ('70841.0' is read as a float by pandas too)
+                self.integer &= bool(valid.str.fullmatch(r'[-+]?\d+').all())
+                numbers = numbers.to_numpy(dtype=float)
+                self.float32_exact &= bool((numbers.astype(np.float32) == numbers).all())
+                self.low = min(self.low, numbers.min())
+                self.high = max(self.high, numbers.max())
+        if not self.numeric:
+            self.delimited |= bool(valid.str.contains(';', regex=False).any())
+        if len(self.uniques) <= self.max_categories:
+            self.uniques.update(valid.unique())
+
+    def dtype(self, multi_select):
+        if self.n_valid == 0:
+            return 'float32'
+        if self.numeric:
+            # A column with gaps stays float, as with a plain read_csv, so that
+            # code assigning fractions into it (salary / 12) keeps working
+            if self.integer and not self.has_nulls:
+                for name in INT_TYPES:
+                    info = np.iinfo(name)
+                    if info.min <= self.low and self.high <= info.max:
+                        return name
+            return 'float32' if self.float32_exact else 'float64'
+        if multi_select or self.delimited:
+            return 'string'
+        if len(self.uniques) <= self.max_categories and len(self.uniques) < self.n_valid / 2:
+            return 'category'
+        return 'string'
+
+
+class SurveyPlan:
+    """Per-column dtypes of the survey file, decided once by `build`.
+
+    `dtypes` maps each column to a dtype name ('string' stands for
+    Arrow-backed strings), `multi_select` lists the ';'-delimited columns.
+    """
+
+    def __init__(self, dtypes, multi_select, source=None):
+        self.dtypes = dtypes
+        self.multi_select = multi_select
+        self.source = source
+
+    @classmethod
+    def build(cls, path, schema_path=SCHEMA, chunksize=20000, max_categories=2000):
+        """Scan `path` chunk by chunk (all columns as text) to plan the dtypes."""
+        schema_multi = set(schema_multi_select(schema_path))
+        scans = {}
+        for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize):
+            for column in chunk.columns:
+                if column not in scans:
+                    scans[column] = _ColumnScan(max_categories)
+                scans[column].update(chunk[column])
+        dtypes = {column: scan.dtype(column in schema_multi) for column, scan in scans.items()}
+        multi_select = [column for column, scan in scans.items()
+                        if not scan.numeric and (column in schema_multi or scan.delimited)]
+        return cls(dtypes, multi_select, source=plan_key(path, schema_path))
+
+    def read_dtypes(self):
+        """The plan as a `dtype=` argument of `pd.read_csv`."""
+        string = STRING_DTYPE if STRING_DTYPE is not object else str
+        return {column: string if dtype == 'string' else dtype
+                for column, dtype in self.dtypes.items()}
+
+    def save(self, path=DEFAULT_PLAN):
+        with open(path, 'w') as f:
+            json.dump({'source': self.source, 'dtypes': self.dtypes,
+                       'multi_select': self.multi_select}, f, indent=2)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PLAN):
+        with open(path) as f:
+            plan = json.load(f)
+        return cls(plan['dtypes'], plan['multi_select'], plan.get('source'))
+
+
+def plan_key(path, schema_path=SCHEMA):
+    """Digests of the survey file and of its schema, which a plan is valid for."""
+    return {'data': DatasetCache().digest(path), 'schema': file_digest(schema_path)}
+
+
+def survey_plan(path, schema_path=SCHEMA, plan_path=DEFAULT_PLAN):
+    """The saved plan at `plan_path` if it was built from this very file and schema.
+
+    Otherwise (first use, a new yearly dump, an edited schema) the file is
+    scanned again and the new plan saved in place of the old one.
+    """
+    if os.path.exists(plan_path):
+        plan = SurveyPlan.load(plan_path)
+        if plan.source == plan_key(path, schema_path):
+            return plan
+    plan = SurveyPlan.build(path, schema_path)
+    plan.save(plan_path)
+    return plan
+
+
+def read_survey(path, schema_path=SCHEMA, plan_path=DEFAULT_PLAN, **kwargs):
+    """Read the survey in one pass with the dtypes of its plan.
+
+    The plan is rebuilt whenever the file or the schema changes. Extra
+    keyword arguments are passed on to `pd.read_csv`.
+    """
+    plan = survey_plan(path, schema_path, plan_path)
+    return pd.read_csv(path, dtype=plan.read_dtypes(), **kwargs)
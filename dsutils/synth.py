@@ -0,0 +1,125 @@
+"""Synthetic Uber+Drives style trip logs for scale testing.
+
+`TripGenerator` learns from the ~1,150 row sample by bootstrapping whole trips:
+every synthetic trip copies the START/STOP pair, CATEGORY and PURPOSE of a
+random sample trip, and jitters its MILES, duration and start time. So the
+frequencies of stations, pairs, categories and purposes, and the shape of the
+MILES / duration / hour-of-day distributions, follow the sample. Output is
+written chunk by chunk, as csv in the original layout or as binary chunks,
+so 10M-1B rows never have to be in memory at once. A fixed seed gives the
+same file every time.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from dsutils.trips import read_trips
+
+RAW_COLUMNS = ['START_DATE*', 'END_DATE*', 'CATEGORY*', 'START*', 'STOP*', 'MILES*', 'PURPOSE*']
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class TripGenerator:
+    """Generates trips statistically similar to a sample of cleaned trips.
+
+    `noise` is the sigma of the lognormal factor applied to MILES and
+    duration. With ``station_copies > 1`` every trip is moved to one of that
+    many copies of the station network ('Cary #3' -> 'Morrisville #3'), which
+    multiplies the number of distinct stations and pairs.
+    """
+
+    def __init__(self, sample, seed=0, noise=0.1, station_copies=1):
+        sample = sample.dropna(subset=['start_dt', 'end_dt', 'MILES']).reset_index(drop=True)
+        self.start = sample['START'].to_numpy(dtype=object)
+        self.stop = sample['STOP'].to_numpy(dtype=object)
+        self.cat = sample['CAT'].to_numpy(dtype=object)
+        self.purpose = sample['PURPOSE'].to_numpy(dtype=object)
+        self.miles = sample['MILES'].to_numpy(dtype=float)
+        self.start_dt = sample['start_dt'].to_numpy()
+        self.duration_mins = ((sample['end_dt'] - sample['start_dt'])
+                              .dt.total_seconds().to_numpy() / 60)
+        self.seed = seed
+        self.noise = noise
+        self.station_copies = station_copies
+
+    @classmethod
+    def from_csv(cls, path='../01_InFiles/Uber+Drives+2016.csv', **kwargs):
+        return cls(pd.concat(read_trips(path), ignore_index=True), **kwargs)
+
+    def generate(self, n, chunk_no=0):
+        """`n` synthetic trips with the cleaned column names.
+
+        `chunk_no` selects an independent random stream, so chunks of a big
+        file can be generated separately and still be reproducible.
+        """
+        rng = np.random.default_rng([self.seed, chunk_no])
+        pick = rng.integers(len(self.miles), size=n)
+        miles = np.round(self.miles[pick] * rng.lognormal(0, self.noise, n), 1)
+        duration = np.round(self.duration_mins[pick] * rng.lognormal(0, self.noise, n))
+        # Whole weeks keep the weekday, the minutes jitter the time of day
+        shift = (rng.integers(-4, 5, n) * 7 * 24 * 60 + rng.integers(-30, 31, n))
+        start_dt = self.start_dt[pick] + shift.astype('timedelta64[m]')
+        end_dt = start_dt + duration.astype('timedelta64[m]')
+        start, stop = self.start[pick], self.stop[pick]
+        if self.station_copies > 1:
+            copy = pd.Series(rng.integers(self.station_copies, size=n)).astype(str).radd(' #')
+            start = pd.Series(start) + copy
+            stop = pd.Series(stop) + copy
+        return pd.DataFrame({
+            'START': start, 'STOP': stop, 'CAT': self.cat[pick],
+            'PURPOSE': self.purpose[pick], 'MILES': miles,
+            'start_dt': start_dt, 'end_dt': end_dt,
+        })
+
+    def _chunks(self, n_rows, chunksize):
+        for chunk_no, first in enumerate(range(0, n_rows, chunksize)):
+            yield chunk_no, self.generate(min(chunksize, n_rows - first), chunk_no)
+
+    @staticmethod
+    def to_raw(trips):
+        """Trips in the layout of Uber+Drives+2016.csv."""
+        return pd.DataFrame({
+            'START_DATE*': _format_dates(trips['start_dt']),
+            'END_DATE*': _format_dates(trips['end_dt']),
+            'CATEGORY*': trips['CAT'], 'START*': trips['START'], 'STOP*': trips['STOP'],
+            'MILES*': trips['MILES'], 'PURPOSE*': trips['PURPOSE'],
+        }, columns=RAW_COLUMNS)
+
+    def write_csv(self, path, n_rows, chunksize=1000000):
+        """Write `n_rows` trips to one csv in the original layout."""
+        for chunk_no, trips in self._chunks(n_rows, chunksize):
+            self.to_raw(trips).to_csv(path, mode='w' if chunk_no == 0 else 'a',
+                                      header=chunk_no == 0, index=False)
+        return path
+
+    def write_chunks(self, directory, n_rows, chunksize=1000000):
+        """Write `n_rows` trips as numbered binary chunk files.
+
+        Chunks keep the parsed dtypes (no date parsing when reading them back)
+        and are parquet when pyarrow is installed, pickle otherwise.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for chunk_no, trips in self._chunks(n_rows, chunksize):
+            path = os.path.join(directory, 'trips-%05d' % chunk_no)
+            if HAS_PYARROW:
+                path += '.parquet'
+                trips.to_parquet(path, index=False)
+            else:
+                path += '.pkl'
+                trips.to_pickle(path)
+            paths.append(path)
+        return paths
+
+
+def _format_dates(dt):
+    """'%m/%d/%Y %H:%M' without zero padding, as in the sample file."""
+    dt = pd.Series(dt).dt
+    return (dt.month.astype(str) + '/' + dt.day.astype(str) + '/' + dt.year.astype(str)
+            + ' ' + dt.hour.astype(str) + ':' + dt.minute.astype(str).str.zfill(2))
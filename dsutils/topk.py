@@ -0,0 +1,83 @@
+"""Top-k / bottom-k selection with `np.argpartition` instead of full sorts.
+
+``top_k(s, 10)`` gives the same rows as ``s.sort_values(ascending=False).head(10)``
+but only the k selected values are sorted, so the cost is O(n + k log k)
+instead of O(n log n).
+"""
+import numpy as np
+import pandas as pd
+
+
+def top_positions(values, k, largest=True):
+    """Positions of the `k` largest (or smallest) values, best first.
+
+    NaNs are never selected.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    keys = -values[valid] if largest else values[valid]
+    if len(keys) > k:
+        part = np.argpartition(keys, k - 1)[:k]
+        valid, keys = valid[part], keys[part]
+    return valid[np.argsort(keys, kind='stable')]
+
+
+def top_k(values, k=10, largest=True):
+    """The `k` largest entries of a Series (or array), largest first."""
+    values = pd.Series(values)
+    return values.iloc[top_positions(values.to_numpy(), k, largest)]
+
+
+def bottom_k(values, k=10):
+    """The `k` smallest entries of a Series, smallest first."""
+    return top_k(values, k, largest=False)
+
+
+def top_k_rows(df, column, k=10, largest=True):
+    """Rows of `df` with the `k` largest values of `column`.
+
+    Same as ``df.sort_values(by=column, ascending=not largest).head(k)``.
+    """
+    return df.iloc[top_positions(df[column].to_numpy(), k, largest)]
+
+
+def top_k_counts(values, k=10):
+    """Same as ``values.value_counts().head(k)``, without sorting every key."""
+    codes, uniques = pd.factorize(pd.Series(values))
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    pos = top_positions(counts, k)
+    return pd.Series(counts[pos], index=pd.Index(uniques[pos]), name='count')
+
+
+def grouped_top_k(df, by, column, k=10, agg='sum', largest=True):
+    """`agg` of `column` per `by` group, keeping only the `k` best groups.
+
+    Same as ``df.groupby(by)[column].agg(agg).sort_values(ascending=False).head(k)``.
+    """
+    return top_k(df.groupby(by, sort=False)[column].agg(agg), k, largest)
+
+
+class StreamingTopK:
+    """Keeps the `k` best (key, value) items of a stream of Series.
+
+    Each `update` merges the current leaders with the new chunk and keeps the
+    best `k` again, so memory stays at O(k + chunk). Keys are assumed to be
+    distinct across chunks (e.g. trips); aggregate repeated keys first.
+    """
+
+    def __init__(self, k=10, largest=True):
+        self.k = k
+        self.largest = largest
+        self.leaders = pd.Series(dtype=float)
+
+    def update(self, values):
+        values = pd.Series(values)
+        if not len(self.leaders):
+            candidates = values
+        else:
+            candidates = pd.concat([self.leaders, values])
+        self.leaders = top_k(candidates, self.k, self.largest)
+        return self
+
+    def result(self):
+        return self.leaders